@@ -6,13 +6,33 @@
 """
 
 import os
+import copy
 import yaml
 import json
+import atexit
 import logging
+import threading
 from typing import Dict, Any, Union, Optional
 
+# orjson 为可选依赖，可用时用于加速模型配置的读写
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 缓存中表示“路径不存在”的哨兵值，与合法的 None 值区分开
+_MISSING = object()
+
+# 自动保存的防抖延迟(秒)，该时间内的多次更新只写一次文件
+SAVE_DEBOUNCE_DELAY = 0.5
+# 延迟保存失败后重新尝试的间隔(秒)
+SAVE_RETRY_DELAY = 5.0
+
+# 优先使用 libyaml 的 C 实现加载器，不可用时回退到纯 Python 版本
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 class ConfigManager:
     """配置管理器类"""
     
@@ -28,12 +48,45 @@ class ConfigManager:
             'config'
         )
         self.settings_path = os.path.join(self.config_dir, 'settings.yaml')
+        # settings.yaml 的 JSON 缓存副本，解析速度远快于 YAML
+        self.settings_cache_path = os.path.join(self.config_dir, 'settings.cache.json')
         self.model_config_path = os.path.join(self.config_dir, 'model_config.json')
         
         self.settings = {}
-        self.model_config = {}
+        # 模型配置延迟到首次访问 model_config 时才加载
+        self._model_config: Dict[str, Any] = {}
+        self._model_config_loaded = False
+        
+        # 点分隔路径 -> 已解析值 的查找缓存，配置变更时清空
+        self._settings_cache: Dict[str, Any] = {}
+        self._model_cache: Dict[str, Any] = {}
+        # 设置版本号，每次设置内容可能变化时递增，使用方可据此判断自己缓存的配置值是否过期
+        self.settings_version = 0
         
-        self.load_config()
+        # 保护 settings/model_config 的修改与保存时的快照，防止序列化过程中字典被其他线程修改
+        self._data_lock = threading.RLock()
+        # 待执行的防抖保存：保存方法名 -> 计时器
+        self._pending_saves: Dict[str, threading.Timer] = {}
+        self._save_lock = threading.Lock()
+        # 串行化实际的文件写入，flush 会等待计时器线程上正在进行的保存完成
+        self._write_lock = threading.Lock()
+        
+        self.load_settings()
+        
+        # 计时器是守护线程，退出时未经 main.py 显式 flush 的待保存内容由这里兜底写入
+        atexit.register(self.flush)
+    
+    @property
+    def model_config(self) -> Dict[str, Any]:
+        """模型配置字典，首次访问时从文件加载"""
+        if not self._model_config_loaded:
+            self.load_model_config()
+        return self._model_config
+    
+    @model_config.setter
+    def model_config(self, value: Dict[str, Any]) -> None:
+        self._model_config = value
+        self._model_config_loaded = True
     
     def load_config(self) -> None:
         """加载所有配置文件"""
@@ -42,30 +95,77 @@ class ConfigManager:
     
     def load_settings(self) -> None:
         """加载YAML配置文件"""
+        # 替换配置字典与清空查找缓存在锁内完成，读取方不会把旧配置中的值写回缓存
+        with self._data_lock:
+            self._invalidate_settings_cache()
+            try:
+                if os.path.exists(self.settings_path):
+                    if self._load_settings_cache():
+                        return
+                    with open(self.settings_path, 'rb') as f:
+                        self.settings = yaml.load(f.read(), Loader=_YamlLoader) or {}
+                    logger.info(f"已加载设置文件: {self.settings_path}")
+                    self._write_settings_cache()
+                else:
+                    logger.warning(f"设置文件不存在: {self.settings_path}")
+                    self.create_default_config()
+            except Exception as e:
+                logger.error(f"加载设置文件失败: {e}", exc_info=True)
+                self.settings = {}
+    
+    def _invalidate_settings_cache(self) -> None:
+        """清空设置查找缓存并递增设置版本号"""
+        self._settings_cache.clear()
+        self.settings_version += 1
+    
+    def _load_settings_cache(self) -> bool:
+        """
+        如果 JSON 缓存不比 settings.yaml 旧，则直接从缓存加载设置
+        
+        Returns:
+            bool: 是否从缓存加载成功
+        """
         try:
-            if os.path.exists(self.settings_path):
-                with open(self.settings_path, 'r', encoding='utf-8') as f:
-                    self.settings = yaml.safe_load(f) or {}
-                logger.info(f"已加载设置文件: {self.settings_path}")
-            else:
-                logger.warning(f"设置文件不存在: {self.settings_path}")
-                self.create_default_config()
-        except Exception as e:
-            logger.error(f"加载设置文件失败: {e}", exc_info=True)
-            self.settings = {}
+            if os.stat(self.settings_cache_path).st_mtime < os.stat(self.settings_path).st_mtime:
+                return False
+            with open(self.settings_cache_path, 'rb') as f:
+                settings = json.loads(f.read())
+        except (OSError, ValueError):
+            return False
+        
+        if not isinstance(settings, dict):
+            return False
+        self.settings = settings
+        logger.info(f"已从缓存加载设置: {self.settings_cache_path}")
+        return True
+    
+    def _write_settings_cache(self, settings: Optional[Dict[str, Any]] = None) -> None:
+        """将设置 (默认为当前设置) 写入 JSON 缓存文件，失败时仅记录警告"""
+        if settings is None:
+            settings = self.settings
+        try:
+            self._atomic_write(self.settings_cache_path, json.dumps(settings, ensure_ascii=False))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入设置缓存失败: {e}")
     
     def load_model_config(self) -> None:
         """加载模型配置JSON文件"""
-        try:
-            if os.path.exists(self.model_config_path):
-                with open(self.model_config_path, 'r', encoding='utf-8') as f:
-                    self.model_config = json.load(f)
-                logger.info(f"已加载模型配置文件: {self.model_config_path}")
-            else:
-                logger.warning(f"模型配置文件不存在: {self.model_config_path}")
-        except Exception as e:
-            logger.error(f"加载模型配置文件失败: {e}", exc_info=True)
-            self.model_config = {}
+        # 替换配置字典与清空查找缓存在锁内完成，读取方不会把旧配置中的值写回缓存
+        with self._data_lock:
+            self._model_config_loaded = True
+            self._model_cache.clear()
+            try:
+                if os.path.exists(self.model_config_path):
+                    # 一次性读入整个文件，再交给解析器处理
+                    with open(self.model_config_path, 'rb') as f:
+                        data = f.read()
+                    self.model_config = orjson.loads(data) if orjson is not None else json.loads(data)
+                    logger.info(f"已加载模型配置文件: {self.model_config_path}")
+                else:
+                    logger.warning(f"模型配置文件不存在: {self.model_config_path}")
+            except Exception as e:
+                logger.error(f"加载模型配置文件失败: {e}", exc_info=True)
+                self.model_config = {}
     
     def create_default_config(self) -> None:
         """创建默认配置文件"""
@@ -118,10 +218,11 @@ class ConfigManager:
         }
         
         try:
-            with open(self.settings_path, 'w', encoding='utf-8') as f:
-                yaml.dump(default_settings, f, default_flow_style=False, allow_unicode=True)
+            self._atomic_write(self.settings_path, self._dump_yaml(default_settings))
             logger.info(f"已创建默认设置文件: {self.settings_path}")
             self.settings = default_settings
+            self._invalidate_settings_cache()
+            self._write_settings_cache()
         except Exception as e:
             logger.error(f"创建默认设置文件失败: {e}", exc_info=True)
         
@@ -172,10 +273,10 @@ class ConfigManager:
         }
         
         try:
-            with open(self.model_config_path, 'w', encoding='utf-8') as f:
-                json.dump(default_model_config, f, indent=2, ensure_ascii=False)
+            self._dump_model_config(default_model_config)
             logger.info(f"已创建默认模型配置文件: {self.model_config_path}")
             self.model_config = default_model_config
+            self._model_cache.clear()
         except Exception as e:
             logger.error(f"创建默认模型配置文件失败: {e}", exc_info=True)
     
@@ -187,9 +288,12 @@ class ConfigManager:
             bool: 保存是否成功
         """
         try:
-            with open(self.settings_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.settings, f, default_flow_style=False, allow_unicode=True)
+            # 在锁内取快照，序列化和写文件时不再受其他线程修改的影响
+            with self._data_lock:
+                settings = copy.deepcopy(self.settings)
+            self._atomic_write(self.settings_path, self._dump_yaml(settings))
             logger.info(f"已保存设置到文件: {self.settings_path}")
+            self._write_settings_cache(settings)
             return True
         except Exception as e:
             logger.error(f"保存设置文件失败: {e}", exc_info=True)
@@ -203,14 +307,53 @@ class ConfigManager:
             bool: 保存是否成功
         """
         try:
-            with open(self.model_config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.model_config, f, indent=2, ensure_ascii=False)
+            with self._data_lock:
+                model_config = copy.deepcopy(self.model_config)
+            self._dump_model_config(model_config)
             logger.info(f"已保存模型配置到文件: {self.model_config_path}")
             return True
         except Exception as e:
             logger.error(f"保存模型配置文件失败: {e}", exc_info=True)
             return False
     
+    def _dump_model_config(self, data: Dict[str, Any]) -> None:
+        """将模型配置写入JSON文件，优先使用 orjson"""
+        if orjson is not None:
+            content = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        else:
+            content = json.dumps(data, indent=2, ensure_ascii=False)
+        self._atomic_write(self.model_config_path, content)
+    
+    @staticmethod
+    def _dump_yaml(data: Dict[str, Any]) -> str:
+        """将设置序列化为YAML文本"""
+        return yaml.dump(data, default_flow_style=False, allow_unicode=True)
+    
+    @staticmethod
+    def _atomic_write(path: str, content: Union[str, bytes]) -> None:
+        """
+        原子地写入文件：先写入临时文件并刷到磁盘，再用 os.replace 替换目标文件，
+        避免写入中途崩溃导致配置文件损坏
+        
+        Args:
+            path: 目标文件路径
+            content: 文件内容，字符串将按UTF-8编码
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
     def get_setting(self, key_path: str, default: Any = None) -> Any:
         """
         获取指定路径的设置值
@@ -222,16 +365,14 @@ class ConfigManager:
         Returns:
             找到的设置值，或默认值
         """
-        keys = key_path.split('.')
-        value = self.settings
-        
-        for key in keys:
-            if isinstance(value, dict) and key in value:
-                value = value[key]
-            else:
-                return default
+        try:
+            value = self._settings_cache[key_path]
+        except KeyError:
+            # 与 update_* 的修改和清空缓存互斥，避免把修改前解析出的旧值写进刚清空的缓存
+            with self._data_lock:
+                value = self._settings_cache[key_path] = self._resolve(self.settings, key_path)
         
-        return value
+        return default if value is _MISSING else value
     
     def get_model_config(self, key_path: str, default: Any = None) -> Any:
         """
@@ -244,14 +385,34 @@ class ConfigManager:
         Returns:
             找到的配置值，或默认值
         """
-        keys = key_path.split('.')
-        value = self.model_config
+        try:
+            value = self._model_cache[key_path]
+        except KeyError:
+            # 与 update_* 的修改和清空缓存互斥，避免把修改前解析出的旧值写进刚清空的缓存
+            with self._data_lock:
+                value = self._model_cache[key_path] = self._resolve(self.model_config, key_path)
         
-        for key in keys:
+        return default if value is _MISSING else value
+    
+    @staticmethod
+    def _resolve(root: Dict[str, Any], key_path: str) -> Any:
+        """
+        沿点分隔路径逐级查找配置值
+        
+        Args:
+            root: 配置字典的根
+            key_path: 点分隔的键路径
+            
+        Returns:
+            找到的值，路径不存在时返回 _MISSING
+        """
+        value = root
+        
+        for key in key_path.split('.'):
             if isinstance(value, dict) and key in value:
                 value = value[key]
             else:
-                return default
+                return _MISSING
         
         return value
     
@@ -262,26 +423,30 @@ class ConfigManager:
         Args:
             key_path: 点分隔的键路径，如'pet.voice.volume'
             value: 要设置的新值
-            auto_save: 是否自动保存到文件
+            auto_save: 是否自动保存到文件 (延迟 SAVE_DEBOUNCE_DELAY 秒合并写入)
             
         Returns:
-            更新是否成功
+            更新是否成功。auto_save 时文件在稍后写入，返回值不代表写入结果；
+            需要确认已落盘时调用 flush()，其返回值为实际的保存结果
         """
         keys = key_path.split('.')
-        target = self.settings
-        
-        # 遍历到最后一个键的父对象
-        for key in keys[:-1]:
-            if key not in target:
-                target[key] = {}
-            target = target[key]
         
-        # 设置最后一个键的值
-        target[keys[-1]] = value
+        with self._data_lock:
+            target = self.settings
+            
+            # 遍历到最后一个键的父对象
+            for key in keys[:-1]:
+                if key not in target:
+                    target[key] = {}
+                target = target[key]
+            
+            # 设置最后一个键的值
+            target[keys[-1]] = value
+            self._invalidate_settings_cache()
         
-        # 如果需要，保存到文件
+        # 如果需要，安排一次延迟保存
         if auto_save:
-            return self.save_settings()
+            self._schedule_save('save_settings')
         return True
     
     def update_model_config(self, key_path: str, value: Any, auto_save: bool = True) -> bool:
@@ -291,24 +456,78 @@ class ConfigManager:
         Args:
             key_path: 点分隔的键路径，如'model_config.llm.api_key'
             value: 要设置的新值
-            auto_save: 是否自动保存到文件
+            auto_save: 是否自动保存到文件 (延迟 SAVE_DEBOUNCE_DELAY 秒合并写入)
             
         Returns:
-            更新是否成功
+            更新是否成功。auto_save 时文件在稍后写入，返回值不代表写入结果；
+            需要确认已落盘时调用 flush()，其返回值为实际的保存结果
         """
         keys = key_path.split('.')
-        target = self.model_config
-        
-        # 遍历到最后一个键的父对象
-        for key in keys[:-1]:
-            if key not in target:
-                target[key] = {}
-            target = target[key]
         
-        # 设置最后一个键的值
-        target[keys[-1]] = value
+        with self._data_lock:
+            target = self.model_config
+            
+            # 遍历到最后一个键的父对象
+            for key in keys[:-1]:
+                if key not in target:
+                    target[key] = {}
+                target = target[key]
+            
+            # 设置最后一个键的值
+            target[keys[-1]] = value
+            self._model_cache.clear()
         
-        # 如果需要，保存到文件
+        # 如果需要，安排一次延迟保存
         if auto_save:
-            return self.save_model_config()
+            self._schedule_save('save_model_config')
         return True
+    
+    def _schedule_save(self, save_method: str, delay: float = SAVE_DEBOUNCE_DELAY) -> None:
+        """
+        安排一次防抖保存，已有待执行的同类保存时不重复安排
+        
+        Args:
+            save_method: 保存方法名，'save_settings' 或 'save_model_config'
+            delay: 延迟执行的秒数
+        """
+        with self._save_lock:
+            if save_method in self._pending_saves:
+                return
+            timer = threading.Timer(delay, self._run_pending_save, args=(save_method,))
+            timer.daemon = True
+            self._pending_saves[save_method] = timer
+            timer.start()
+    
+    def _run_pending_save(self, save_method: str) -> None:
+        """防抖计时器到期后执行保存，失败时在 SAVE_RETRY_DELAY 秒后重试"""
+        # 先取得写入锁再移除待执行记录：flush 要么看到这条记录并代为保存，
+        # 要么等待这里的保存完成后才返回，不会出现两边都没有保存的间隙
+        with self._write_lock:
+            with self._save_lock:
+                # 记录已被 flush 取走 (由 flush 负责保存)，这里不再重复保存
+                if self._pending_saves.get(save_method) is not threading.current_thread():
+                    return
+                del self._pending_saves[save_method]
+            saved = getattr(self, save_method)()
+        if not saved:
+            logger.warning(f"延迟保存 {save_method} 失败，{SAVE_RETRY_DELAY} 秒后重试")
+            self._schedule_save(save_method, SAVE_RETRY_DELAY)
+    
+    def flush(self) -> bool:
+        """
+        立即执行所有待执行的延迟保存，应在程序退出前调用 (同时已注册到 atexit)
+        
+        Returns:
+            bool: 所有待执行的保存是否都成功 (没有待执行的保存时为True)
+        """
+        with self._save_lock:
+            pending = list(self._pending_saves.items())
+            self._pending_saves.clear()
+        
+        success = True
+        # 持有写入锁：计时器线程上正在进行的保存完成后才返回
+        with self._write_lock:
+            for save_method, timer in pending:
+                timer.cancel()
+                success = getattr(self, save_method)() and success
+        return success
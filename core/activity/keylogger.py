@@ -6,11 +6,11 @@
 """
 
 import os
+import sys
 import time
 import logging
-import threading
+from collections import Counter
 from typing import Dict, Any, Optional, List, Callable
-from datetime import datetime, date
 
 # 仅在Windows上导入这些模块
 try:
@@ -23,6 +23,15 @@ from core.events import EventSystem
 
 logger = logging.getLogger(__name__)
 
+# 每累计多少次按键才发出一次 'keypress' 事件 (必须是2的幂，用位掩码判断)
+KEYPRESS_EVENT_BATCH = 16
+# 每累计多少次按键记录一次调试日志 (必须是2的幂)
+KEYPRESS_LOG_INTERVAL = 128
+
+def _current_hour() -> int:
+    """返回本地时间的当前小时，直接读取 time.localtime 而不构造 datetime 对象"""
+    return time.localtime().tm_hour
+
 class KeyLogger:
     """
     键盘记录器，统计编程时的键盘输入
@@ -45,13 +54,15 @@ class KeyLogger:
         
         # 统计数据
         self.keypress_count = 0
-        self.key_stats = {}  # 记录每个键的按下次数
+        self.key_stats: Counter = Counter()  # 记录每个键的按下次数
         self.hourly_stats = {hour: 0 for hour in range(24)}  # 按小时统计
+        # 当前小时的缓存，每分钟最多刷新一次，避免每次按键都构造 datetime
+        self._hour_cached = _current_hour()
+        self._hour_deadline = time.monotonic() + 60
         self.is_programming_mode = False  # 是否处于编程模式
         
-        # 线程控制
+        # 运行状态 (按键回调运行在 keyboard 库自己管理的钩子线程上)
         self.is_running = False
-        self.hook_thread = None
         
         # 注册事件处理
         self.event_system.register('programming_started', self._on_programming_started)
@@ -67,17 +78,19 @@ class KeyLogger:
         if not self.enabled or self.is_running:
             return
         
+        try:
+            # 注册按键回调，keyboard 库会在其内部线程中调用它
+            keyboard.on_press(self._on_key_press)
+        except Exception as e:
+            logger.error(f"设置键盘钩子时出错: {e}", exc_info=True)
+            return
+        
         self.is_running = True
-        self.hook_thread = threading.Thread(target=self._keyboard_hook, daemon=True)
-        self.hook_thread.start()
         logger.info("键盘记录器已启动")
     
     def stop(self) -> None:
         """停止键盘记录"""
         self.is_running = False
-        # 如果线程在运行，等待它结束
-        if self.hook_thread and self.hook_thread.is_alive():
-            self.hook_thread.join(timeout=1.0)
         # 尝试取消键盘钩子
         try:
             keyboard.unhook_all()
@@ -85,26 +98,6 @@ class KeyLogger:
             pass
         logger.info("键盘记录器已停止")
     
-    def _keyboard_hook(self) -> None:
-        """设置键盘钩子监听按键"""
-        try:
-            # 注册按键回调
-            keyboard.on_press(self._on_key_press)
-            logger.debug("键盘钩子设置成功")
-            
-            # 保持线程运行直到停止信号
-            while self.is_running:
-                time.sleep(0.1)
-                
-        except Exception as e:
-            logger.error(f"设置键盘钩子时出错: {e}", exc_info=True)
-        finally:
-            # 清理钩子
-            try:
-                keyboard.unhook_all()
-            except:
-                pass
-    
     def _on_key_press(self, event) -> None:
         """
         按键按下回调函数
@@ -116,27 +109,33 @@ class KeyLogger:
         if not self.is_programming_mode:
             return
         
-        # 获取按键名称
-        key_name = event.name if hasattr(event, 'name') else "unknown"
+        # 获取按键名称 (按键名集合很小且高度重复，驻留后可共享同一字符串对象)
+        key_name = getattr(event, 'name', None)
+        key_name = sys.intern(key_name) if isinstance(key_name, str) else "unknown"
         
         # 更新统计数据
         self.keypress_count += 1
-        self.key_stats[key_name] = self.key_stats.get(key_name, 0) + 1
+        self.key_stats[key_name] += 1
         
         # 更新小时统计
-        current_hour = datetime.now().hour
-        self.hourly_stats[current_hour] += 1
-        
-        # 每100次按键记录一次日志和发送事件
-        if self.keypress_count % 100 == 0:
-            logger.debug(f"键盘输入计数: {self.keypress_count}")
+        now = time.monotonic()
+        if now >= self._hour_deadline:
+            self._hour_cached = _current_hour()
+            self._hour_deadline = now + 60
+        self.hourly_stats[self._hour_cached] += 1
+        
+        # 每 KEYPRESS_LOG_INTERVAL 次按键记录一次日志
+        if self.keypress_count & (KEYPRESS_LOG_INTERVAL - 1) == 0:
+            logger.debug("键盘输入计数: %d", self.keypress_count)
             
-        # 触发按键事件
-        self.event_system.emit('keypress', {
-            'key': key_name,
-            'count': self.keypress_count,
-            'timestamp': time.time()
-        })
+        # 按批次触发按键事件，避免每次按键都经过事件系统
+        if self.keypress_count & (KEYPRESS_EVENT_BATCH - 1) == 0:
+            self.event_system.emit('keypress', {
+                'key': key_name,
+                'count': self.keypress_count,
+                'batch': KEYPRESS_EVENT_BATCH,
+                'timestamp': time.time()
+            })
     
     def _on_programming_started(self, event_data: Dict[str, Any]) -> None:
         """
@@ -175,9 +174,8 @@ class KeyLogger:
         Returns:
             包含按键统计的字典
         """
-        # 按频率排序最常用的键
-        sorted_keys = sorted(self.key_stats.items(), key=lambda x: x[1], reverse=True)
-        top_keys = dict(sorted_keys[:10]) if sorted_keys else {}
+        # 取频率最高的10个键 (堆选择，无需对全部按键排序)
+        top_keys = dict(self.key_stats.most_common(10))
         
         return {
             'total_keypresses': self.keypress_count,
@@ -188,6 +186,6 @@ class KeyLogger:
     def reset_daily_stats(self) -> None:
         """重置每日统计数据"""
         self.keypress_count = 0
-        self.key_stats = {}
+        self.key_stats.clear()
         self.hourly_stats = {hour: 0 for hour in range(24)}
         logger.info("键盘统计数据已重置")
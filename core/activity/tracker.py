@@ -6,10 +6,13 @@
 """
 
 import os
+import re
+import sys
 import time
 import logging
 import threading
-from typing import List, Dict, Any, Optional
+from array import array
+from typing import List, Dict, Any, Optional, Tuple
 
 # 仅在Windows上导入这些模块
 try:
@@ -25,6 +28,20 @@ from core.events import EventSystem
 
 logger = logging.getLogger(__name__)
 
+# 需要进一步根据窗口标题判断的浏览器进程
+BROWSER_PROCESSES = ('chrome.exe', 'msedge.exe', 'firefox.exe')
+
+# 浏览器窗口标题中出现这些关键字时视为编程相关网站
+PROGRAMMING_SITES = ('github', 'stackoverflow', 'gitlab', 'bitbucket', 'docs.python', 'developer.mozilla')
+# 所有关键字合并成一个正则，对标题只做一次扫描
+_PROGRAMMING_SITES_RE = re.compile('|'.join(map(re.escape, PROGRAMMING_SITES)), re.IGNORECASE)
+
+# 进程名缓存的最大条目数
+PID_NAME_CACHE_SIZE = 64
+
+# 会话结束时间数组中表示“会话尚未结束”的占位值
+SESSION_OPEN = -1.0
+
 class ActivityTracker:
     """
     程序使用活动追踪器，监控用户正在使用的窗口应用程序
@@ -43,36 +60,57 @@ class ActivityTracker:
         
         # 从配置中获取监控的应用列表
         self.programming_apps = self.config.get_setting('stats.programming_apps', [])
+        # 预先转为小写集合，每次检查只需一次哈希查找
+        self._programming_apps_lower = frozenset(app.lower() for app in self.programming_apps)
+        # 进程名 -> 是否为编程应用 的判断结果缓存 (含子串匹配的结果)
+        self._app_match_cache: Dict[str, bool] = {}
         self.idle_threshold = self.config.get_setting('stats.record_idle_threshold', 300)
         
         # 追踪状态
-        self.is_running = False
+        # 停止信号：置位表示未运行，start() 时清除，stop() 时置位以立即唤醒等待中的线程
+        self._stop_event = threading.Event()
+        self._stop_event.set()
         self.is_programming = False
         self.current_app = ""
         self.current_window_title = ""
         self.last_activity_time = time.time()
         self.total_programming_time = 0
-        self.programming_sessions = []
+        
+        # 编程会话按列存储 (开始时间、结束时间、应用ID 三个并行数组)，
+        # 时间戳只用于计算会话时长，取自 time.monotonic()，不受系统时钟调整影响；
+        # 应用名通过 _app_ids/_app_names 映射为整数ID，避免每个会话保存一个字典
+        self._session_starts = array('d')
+        self._session_ends = array('d')
+        self._session_app_ids = array('i')
+        self._app_ids: Dict[str, int] = {}
+        self._app_names: List[str] = []
+        
+        # PID -> (进程创建时间, 小写进程名) 缓存，避免每次检查都查询进程名
+        self._pid_name_cache: Dict[int, Tuple[float, str]] = {}
+        # 上一次检查时的前台窗口句柄
+        self._last_hwnd = None
         
         # 线程
         self.tracker_thread = None
-        
-        # 注册事件监听
-        self.event_system.register('keypress', self._on_keypress)
+    
+    @property
+    def is_running(self) -> bool:
+        """活动追踪器是否正在运行"""
+        return not self._stop_event.is_set()
     
     def start(self) -> None:
         """启动活动追踪"""
         if self.is_running:
             return
         
-        self.is_running = True
+        self._stop_event.clear()
         self.tracker_thread = threading.Thread(target=self._tracking_loop, daemon=True)
         self.tracker_thread.start()
         logger.info("活动追踪器已启动")
         
     def stop(self) -> None:
         """停止活动追踪"""
-        self.is_running = False
+        self._stop_event.set()
         if self.tracker_thread and self.tracker_thread.is_alive():
             self.tracker_thread.join(timeout=1.0)
         logger.info("活动追踪器已停止")
@@ -84,10 +122,10 @@ class ActivityTracker:
         while self.is_running:
             try:
                 self._check_active_window()
-                time.sleep(check_interval)
+                self._stop_event.wait(check_interval)
             except Exception as e:
                 logger.error(f"窗口追踪错误: {e}", exc_info=True)
-                time.sleep(check_interval * 2)  # 出错时增加延迟
+                self._stop_event.wait(check_interval * 2)  # 出错时增加延迟
     
     def _check_active_window(self) -> None:
         """
@@ -97,29 +135,34 @@ class ActivityTracker:
         try:
             # 获取当前活动窗口
             hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
             
-            # 获取进程信息
-            try:
-                process = psutil.Process(pid)
-                process_name = process.name().lower()
-                window_title = win32gui.GetWindowText(hwnd)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                process_name = ""
-                window_title = ""
+            # 前台窗口未变化时沿用上次的进程名，跳过 PID 和进程信息查询
+            if hwnd != self._last_hwnd:
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                try:
+                    process_name = self._get_process_name(pid)
+                    # 只有查询成功才记住该窗口；查询失败时下次检查会重新尝试
+                    self._last_hwnd = hwnd
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    process_name = ""
+                    self._last_hwnd = None
+                self.current_app = process_name
+            else:
+                process_name = self.current_app
+            
+            # 窗口标题在同一窗口内也可能变化 (如浏览器切换标签页)，每次都重新获取
+            window_title = win32gui.GetWindowText(hwnd)
             
             # 判断是否为编程应用
             was_programming = self.is_programming
-            self.current_app = process_name
             self.current_window_title = window_title
             
             # 检查是否是我们要追踪的应用程序
-            self.is_programming = any(app.lower() in process_name.lower() for app in self.programming_apps)
+            self.is_programming = self._is_programming_app(process_name)
             
             # 如果是浏览器，检查网页标题是否包含编程相关网站
-            if process_name.endswith(('chrome.exe', 'msedge.exe', 'firefox.exe')) and not self.is_programming:
-                programming_sites = ['github', 'stackoverflow', 'gitlab', 'bitbucket', 'docs.python', 'developer.mozilla']
-                self.is_programming = any(site in window_title.lower() for site in programming_sites)
+            if not self.is_programming and process_name.endswith(BROWSER_PROCESSES):
+                self.is_programming = _PROGRAMMING_SITES_RE.search(window_title) is not None
             
             # 如果状态改变，发送事件
             if was_programming != self.is_programming:
@@ -129,7 +172,7 @@ class ActivityTracker:
                         'app': self.current_app,
                         'title': self.current_window_title
                     })
-                    logger.debug(f"编程会话开始: {self.current_app} - {self.current_window_title}")
+                    logger.debug("编程会话开始: %s - %s", self.current_app, self.current_window_title)
                     self._start_programming_session()
                 else:
                     # 离开编程状态
@@ -139,7 +182,7 @@ class ActivityTracker:
                         'title': self.current_window_title,
                         'duration': duration
                     })
-                    logger.debug(f"编程会话结束: {self.current_app} - 持续时间: {duration:.2f}秒")
+                    logger.debug("编程会话结束: %s - 持续时间: %.2f秒", self.current_app, duration)
             
             # 检查空闲状态
             idle_time = self._get_system_idle_time()
@@ -152,11 +195,56 @@ class ActivityTracker:
                         'idle_time': idle_time,
                         'duration': duration
                     })
-                    logger.debug(f"编程会话因空闲结束 - 空闲时间: {idle_time}秒, 会话时间: {duration:.2f}秒")
+                    logger.debug("编程会话因空闲结束 - 空闲时间: %s秒, 会话时间: %.2f秒", idle_time, duration)
             
         except Exception as e:
             logger.error(f"检查活动窗口时出错: {e}", exc_info=True)
     
+    def _is_programming_app(self, process_name: str) -> bool:
+        """
+        判断进程是否为配置中的编程应用：先做精确匹配，未命中时退回子串匹配
+        (兼容 "pycharm"、"code" 这类不带 .exe 的配置项)，结果按进程名缓存
+        
+        Args:
+            process_name: 小写的进程名称
+            
+        Returns:
+            是否为编程应用
+        """
+        if process_name in self._programming_apps_lower:
+            return True
+        
+        matched = self._app_match_cache.get(process_name)
+        if matched is None:
+            matched = self._app_match_cache[process_name] = any(
+                app in process_name for app in self._programming_apps_lower
+            )
+        return matched
+    
+    def _get_process_name(self, pid: int) -> str:
+        """
+        获取进程的小写名称，优先从缓存读取。
+        缓存同时记录进程的创建时间，Windows 复用 PID 后创建时间不同，旧的缓存条目随之失效
+        
+        Args:
+            pid: 进程ID
+            
+        Returns:
+            小写的进程名称
+        """
+        process = psutil.Process(pid)
+        create_time = process.create_time()  # psutil 在构造 Process 时已读取并缓存，不会再次查询
+        cached = self._pid_name_cache.get(pid)
+        if cached is not None and cached[0] == create_time:
+            return cached[1]
+        
+        process_name = sys.intern(process.name().lower())
+        # 超出容量时按插入顺序淘汰最早的条目 (替换同一 PID 的旧条目时不需要淘汰)
+        if cached is None and len(self._pid_name_cache) >= PID_NAME_CACHE_SIZE:
+            del self._pid_name_cache[next(iter(self._pid_name_cache))]
+        self._pid_name_cache[pid] = (create_time, process_name)
+        return process_name
+    
     def _get_system_idle_time(self) -> float:
         """
         获取系统空闲时间（秒）
@@ -175,24 +263,20 @@ class ActivityTracker:
             logger.error(f"获取系统空闲时间出错: {e}", exc_info=True)
             return 0.0
     
-    def _on_keypress(self, event_data: Dict[str, Any]) -> None:
-        """
-        键盘输入事件回调，更新最后活动时间
-        
-        Args:
-            event_data: 事件数据，包含按键信息
-        """
-        self.last_activity_time = time.time()
+    def _has_open_session(self) -> bool:
+        """最后一个编程会话是否尚未结束"""
+        return bool(self._session_ends) and self._session_ends[-1] == SESSION_OPEN
     
     def _start_programming_session(self) -> None:
         """开始一个新的编程会话"""
-        self.programming_sessions.append({
-            'start_time': time.time(),
-            'app': self.current_app,
-            'title': self.current_window_title,
-            'end_time': None,
-            'duration': 0
-        })
+        app_id = self._app_ids.get(self.current_app)
+        if app_id is None:
+            app_id = self._app_ids[self.current_app] = len(self._app_names)
+            self._app_names.append(self.current_app)
+        
+        self._session_starts.append(time.monotonic())
+        self._session_ends.append(SESSION_OPEN)
+        self._session_app_ids.append(app_id)
     
     def _end_programming_session(self) -> float:
         """
@@ -201,15 +285,13 @@ class ActivityTracker:
         Returns:
             会话持续时间（秒）
         """
-        current_time = time.time()
+        current_time = time.monotonic()
         duration = 0.0
         
         # 如果有活跃的会话，结束它
-        if self.programming_sessions and self.programming_sessions[-1]['end_time'] is None:
-            session = self.programming_sessions[-1]
-            session['end_time'] = current_time
-            duration = current_time - session['start_time']
-            session['duration'] = duration
+        if self._has_open_session():
+            self._session_ends[-1] = current_time
+            duration = current_time - self._session_starts[-1]
             self.total_programming_time += duration
         
         return duration
@@ -222,30 +304,31 @@ class ActivityTracker:
             包含统计信息的字典
         """
         # 如果有未结束的会话，先结束它
-        if self.is_programming and self.programming_sessions and self.programming_sessions[-1]['end_time'] is None:
+        if self.is_programming and self._has_open_session():
             self._end_programming_session()
             # 重新开始当前会话
             self._start_programming_session()
         
-        # 计算会话统计信息
-        app_times = {}
-        for session in self.programming_sessions:
-            if session['end_time'] is not None:
-                app = session['app']
-                duration = session['duration']
-                app_times[app] = app_times.get(app, 0) + duration
+        # 按应用ID累加已结束会话的时长
+        totals: Dict[int, float] = {}
+        for app_id, start, end in zip(self._session_app_ids, self._session_starts, self._session_ends):
+            if end != SESSION_OPEN:
+                totals[app_id] = totals.get(app_id, 0) + (end - start)
+        app_times = {self._app_names[app_id]: duration for app_id, duration in totals.items()}
         
         return {
             'total_time': self.total_programming_time,
             'total_hours': self.total_programming_time / 3600,
-            'session_count': len(self.programming_sessions),
+            'session_count': len(self._session_starts),
             'app_breakdown': app_times
         }
     
     def reset_daily_stats(self) -> None:
         """重置每日统计数据"""
         self.total_programming_time = 0
-        self.programming_sessions = []
+        del self._session_starts[:]
+        del self._session_ends[:]
+        del self._session_app_ids[:]
         # 如果当前正在编程，创建一个新会话
         if self.is_programming:
             self._start_programming_session()
@@ -7,7 +7,7 @@
 """
 
 import logging
-from typing import Callable, Dict, List, Any, Optional
+from typing import Callable, Dict, Tuple, Any, Optional
 
 # 获取日志记录器实例
 logger = logging.getLogger(__name__)
@@ -20,9 +20,10 @@ class EventSystem:
     def __init__(self):
         """
         初始化事件系统。
-        _listeners 是一个字典，键是事件名称 (字符串)，值是该事件对应的处理器函数列表。
+        _listeners 是一个字典，键是事件名称 (字符串)，值是该事件对应的处理器函数元组。
+        元组不可变，注册/注销时整体替换，因此 emit 可以直接迭代而无需复制。
         """
-        self._listeners: Dict[str, List[Callable[[Optional[Dict[str, Any]]], None]]] = {}
+        self._listeners: Dict[str, Tuple[Callable[[Optional[Dict[str, Any]]], None], ...]] = {}
         logger.info("事件系统已初始化。")
 
     def register(self, event_name: str, handler: Callable[[Optional[Dict[str, Any]]], None]) -> None:
@@ -39,13 +40,11 @@ class EventSystem:
             logger.error(f"尝试为事件 '{event_name}' 注册一个不可调用的处理器: {handler}")
             return
 
-        # 如果这是第一次为这个事件名注册处理器，先创建一个空列表
-        if event_name not in self._listeners:
-            self._listeners[event_name] = []
+        handlers = self._listeners.get(event_name, ())
         
-        # 将处理器添加到对应事件的监听器列表中 (如果尚未添加)
-        if handler not in self._listeners[event_name]:
-            self._listeners[event_name].append(handler)
+        # 将处理器添加到对应事件的监听器元组中 (如果尚未添加)，替换为新元组
+        if handler not in handlers:
+            self._listeners[event_name] = handlers + (handler,)
             logger.debug(f"事件 '{event_name}' 已成功注册处理器: {handler.__name__ if hasattr(handler, '__name__') else handler}")
         else:
             logger.warning(f"处理器 {handler.__name__ if hasattr(handler, '__name__') else handler} 已注册到事件 '{event_name}'，不再重复添加。")
@@ -58,8 +57,9 @@ class EventSystem:
             event_name (str): 事件的名称。
             handler (Callable): 要注销的处理器函数或方法。
         """
-        if event_name in self._listeners and handler in self._listeners[event_name]:
-            self._listeners[event_name].remove(handler)
+        handlers = self._listeners.get(event_name, ())
+        if handler in handlers:
+            self._listeners[event_name] = tuple(h for h in handlers if h != handler)
             logger.debug(f"事件 '{event_name}' 的处理器 '{handler.__name__ if hasattr(handler, '__name__') else handler}' 已被注销。")
             # 如果某个事件的所有监听器都被移除了，可以选择从字典中删除该事件键
             if not self._listeners[event_name]:
@@ -68,6 +68,20 @@ class EventSystem:
         else:
             logger.warning(f"尝试注销一个未注册或不存在的处理器: 事件='{event_name}', 处理器='{handler.__name__ if hasattr(handler, '__name__') else handler}'")
 
+    def has_listeners(self, event_name: str) -> bool:
+        """
+        检查某个事件当前是否有已注册的处理器。
+        发出方可以据此跳过构造事件数据 (例如较大的字典) 的开销。
+
+        参数:
+            event_name (str): 事件的名称。
+
+        返回:
+            bool: 有至少一个处理器时为 True。
+        """
+        # 注销最后一个处理器时事件键会被删除，因此只需检查键是否存在
+        return event_name in self._listeners
+
     def emit(self, event_name: str, data: Optional[Dict[str, Any]] = None) -> None:
         """
         发出（或触发/发布）一个事件。
@@ -80,27 +94,29 @@ class EventSystem:
         if data is None:
             data = {} # 确保 data 总是一个字典，即使没有数据传递
             
-        print(f"发出事件 '{event_name}'，数据: {data}")
-        
-        logger.debug(f"正在发出事件 '{event_name}'，数据: {data}")
+        # 该方法在按键等高频路径上调用，日志使用惰性格式化，仅在 DEBUG 开启时才构造字符串
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("正在发出事件 '%s'，数据: %s", event_name, data)
         
         # 检查是否有任何处理器监听了这个事件
-        if event_name in self._listeners:
-            # 为了避免在迭代过程中修改列表（例如，处理器内部又注销了自己），可以复制一份列表
-            handlers_to_call = list(self._listeners[event_name])
+        # 监听器元组在注册/注销时整体替换，处理器内部注销自己也不会影响本次迭代
+        handlers_to_call = self._listeners.get(event_name)
+        if handlers_to_call:
             for handler in handlers_to_call:
                 try:
                     # 调用处理器，并将事件数据作为参数传递
                     handler(data)
-                    logger.debug(f"已为事件 '{event_name}' 调用处理器: {handler.__name__ if hasattr(handler, '__name__') else handler}")
+                    if debug_enabled:
+                        logger.debug("已为事件 '%s' 调用处理器: %s", event_name, getattr(handler, '__name__', handler))
                 except Exception as e:
                     # 如果某个处理器在执行时出错，记录错误但继续执行其他处理器
                     logger.error(
                         f"调用事件 '{event_name}' 的处理器 '{handler.__name__ if hasattr(handler, '__name__') else handler}' 时发生错误: {e}",
                         exc_info=True # exc_info=True 会记录完整的堆栈跟踪信息
                     )
-        else:
-            logger.debug(f"事件 '{event_name}' 被发出，但没有注册的监听器。")
+        elif debug_enabled:
+            logger.debug("事件 '%s' 被发出，但没有注册的监听器。", event_name)
 
 # --- 用于直接运行和测试 EventSystem 的主代码块 ---
 if __name__ == '__main__':
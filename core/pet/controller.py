@@ -5,24 +5,64 @@
 宠物控制器模块 - 管理宠物的行为、状态和动画指令
 """
 
-import os
 import time
 import random
 import logging
 import threading
-from typing import Dict, List, Any, Optional # Callable 已移除，因为当前版本未使用
+from typing import Dict, Any, Optional, Tuple
 
-# 导入宠物数据模型 和 事件系统
+# 导入宠物数据模型 (事件系统实例由调用方传入，不需要导入)
 from core.pet.model import PetModel, MoodType, ActionType, StateType #
-# from core.events import EventSystem # 实际项目中，你需要确保 EventSystem 类能被正确导入
 
 logger = logging.getLogger(__name__) # 获取当前模块的日志记录器
 
+# 枚举成员 -> 字符串值 的预计算映射，热路径上用一次字典查找代替反复访问 Enum.value
+_ACTION_NAMES: Dict[ActionType, str] = {action: action.value for action in ActionType}
+_MOOD_NAMES: Dict[MoodType, str] = {mood: mood.value for mood in MoodType}
+_STATE_NAMES: Dict[StateType, str] = {state: state.value for state in StateType}
+# 大写动作名 -> ActionType，用于把配置中的动作名转换为枚举成员
+_ACTION_BY_NAME: Dict[str, ActionType] = {action.name: action for action in ActionType}
+
+# 心情判定中不应被 NORMAL 覆盖的负面心情 (模块级常量，避免每次判定都构造列表)
+_NEGATIVE_MOODS = frozenset((MoodType.TIRED, MoodType.SAD))
+_NEGATIVE_OR_SLEEPY_MOODS = frozenset((MoodType.TIRED, MoodType.SAD, MoodType.SLEEPY))
+
+# 配置中未指定时，按键反应可选的动作名
+_DEFAULT_KEYPRESS_REACTIONS = ('SURPRISED', 'HAPPY', 'ENCOURAGE')
+
+# 每个状态对应的默认主要动作
+_STATE_DEFAULT_ACTIONS: Dict[StateType, ActionType] = {
+    StateType.IDLE: ActionType.IDLE,
+    StateType.WORKING: ActionType.WORK,
+    StateType.SLEEPING: ActionType.SLEEP,
+}
+
 class PetController:
     """
     宠物控制器，管理宠物的行为、状态，并发出播放动画的指令。
     """
-    
+
+    # 实例属性固定，使用 __slots__ 省去每个实例的 __dict__，处理器中的属性访问也更快
+    # 新增实例属性时需要同步加到这里
+    __slots__ = (
+        'config', 'event_system', 'pet',
+        'state_update_interval', '_next_state_update',
+        '_stats_dirty', '_temporary_action_info', '_rng',
+        '_dialogue_table', '_dialogue_options',
+        # _load_tunables 缓存的配置项
+        '_decay_energy_working', '_decay_happiness_working', '_decay_happiness_idle',
+        '_regen_energy_idle', '_regen_energy_sleeping', '_regen_happiness_sleeping',
+        '_threshold_low_energy', '_duration_alert_low_energy',
+        '_threshold_energy_tired', '_threshold_happiness_sad',
+        '_threshold_energy_happy_excited', '_threshold_happiness_happy_excited',
+        '_threshold_energy_normal', '_threshold_happiness_normal',
+        '_keypress_reaction_interval', '_keypress_reaction_chance',
+        '_keypress_reaction_min', '_keypress_reaction_max', '_keypress_reactions',
+        '_gain_happiness_on_click', '_duration_react_min', '_duration_react_max',
+        '_gain_energy_on_feed', '_gain_happiness_on_feed', '_duration_eat',
+        '_tunables_version',
+    )
+
     def __init__(self, config: Any, event_system: Any):
         """
         初始化宠物控制器
@@ -43,19 +83,32 @@ class PetController:
         self.pet = PetModel(name=pet_name, pet_type=pet_type, personality=personality) #
         
         # 状态更新相关的计时器和间隔
-        self.last_state_update = time.time() # 上次宠物属性更新的时间戳
+        # 所有截止时间都基于 time.monotonic()，不受系统时钟调整影响
         # 从配置读取状态更新间隔，如果配置中没有，则默认为 10.0 秒
         self.state_update_interval = self.config.get_setting('pet.state_update_interval', 10.0) 
-        
-        # 用于管理由 set_action(duration=...) 创建的 threading.Timer 实例列表
-        self._action_timers: List[threading.Timer] = []
+        # 下一次执行宠物属性更新的截止时间，周期检查只需与它比较一次
+        self._next_state_update = time.monotonic() + self.state_update_interval
+
+        # 把周期更新、心情判定和按键处理中用到的配置项读入实例属性
+        self._load_tunables()
 
         # 注册 PetController 关心（需要处理）的事件
         self._register_events()
         
-        self._temporary_action_info: Optional[Dict[str, Any]] = None 
-        # 这个字典将用来存储当前临时动作的类型及其预计结束时间戳，
-        # 例如: {'action': ActionType.REACT, 'end_time': 1678886400.0}
+        # 宠物属性 (含状态、心情、动作) 自上次发出 pet_stats_updated 事件后是否有更新
+        self._stats_dirty = False
+        
+        # 当前临时动作及其预计结束时间戳 (time.monotonic())，同一时刻最多只有一个，
+        # 例如: (ActionType.REACT, 12345.6)。整体替换元组即可原子地更新或清除。
+        self._temporary_action_info: Optional[Tuple[ActionType, float]] = None
+        
+        # 控制器专用的随机数生成器，避免经过 random 模块级函数的全局实例
+        self._rng = random.Random()
+        
+        # 扁平化的对话表 (personality, context, mood) -> 消息元组，首次获取消息时从配置构建
+        self._dialogue_table: Optional[Dict[Tuple[str, Optional[str], str], Tuple[str, ...]]] = None
+        # (personality, context, mood) -> 经过回退链解析后的候选消息
+        self._dialogue_options: Dict[Tuple[str, Optional[str], str], Tuple[str, ...]] = {}
         
         logger.info(f"宠物控制器已初始化: {self.pet.name} (角色类型: {self.pet.pet_type})")
         # 可以在 PetController 初始化完成后，立即设置一个初始状态和动作
@@ -65,11 +118,29 @@ class PetController:
 
 
     def _clear_temporary_action(self) -> None:
-        if self._temporary_action_info:
-            logger.debug(f"PetController: 清除临时动作 '{self._temporary_action_info['action'].value}'。")
+        temporary_action_info = self._temporary_action_info # 取一次快照，其他线程可能同时修改该属性
+        if temporary_action_info:
+            logger.debug("PetController: 清除临时动作 '%s'。", _ACTION_NAMES[temporary_action_info[0]])
             self._temporary_action_info = None
 
 
+    def _emit_changed(self, kind: str, previous: str, current: str) -> None:
+        """
+        发出 'pet_<kind>_changed' 事件 (kind 为 'mood' 或 'action')。
+        set_state 的状态转换过程中不调用它，改由 pet_state_changed 一并通知。
+        """
+        if not self.event_system:
+            return
+        event_name = f'pet_{kind}_changed'
+        if not self.event_system.has_listeners(event_name): # 没有监听者时不构造事件数据
+            return
+        self.event_system.emit(event_name, {
+            'character_name': self.pet.pet_type, # 当前宠物的角色类型
+            f'previous_{kind}': previous,        # 改变前的值
+            f'current_{kind}': current           # 改变后的值
+        })
+
+
     def _register_events(self) -> None:
         """注册本控制器需要监听和处理的事件及其对应的处理方法。"""
         if not self.event_system:
@@ -92,12 +163,14 @@ class PetController:
         self.event_system.register('pet_interaction', self._on_pet_interaction)
     
 
-    def set_mood(self, mood: MoodType) -> None: #
+    def set_mood(self, mood: MoodType, *, _emit: bool = True) -> None: #
         """
         设置宠物的心情。
         
         Args:
             mood: 新的心情状态 (MoodType 枚举成员)。
+            _emit: 内部使用。为 False 时不发出 pet_mood_changed (由 set_state 合并到 pet_state_changed 中)。
+                   按调用传递而不是用实例标志，其他线程同时调用 set_mood 时不会丢失事件。
         """
         # 参数类型检查，确保传入的是 MoodType 枚举成员
         if not isinstance(mood, MoodType): #
@@ -110,14 +183,12 @@ class PetController:
             return # 则不执行后续操作
 
         self.pet.mood = mood # 更新宠物模型中的心情
-        logger.info(f"PetController: 宠物 '{self.pet.name}' 心情从 '{prev_mood.value}' 变为 '{mood.value}'。") # 使用 INFO 级别记录重要状态变化
+        self._stats_dirty = True # 心情也在 pet_stats_updated 的属性字典中，由下一次周期更新合并发出
+        logger.info("PetController: 宠物 '%s' 心情从 '%s' 变为 '%s'。", self.pet.name, _MOOD_NAMES[prev_mood], _MOOD_NAMES[mood]) # 使用 INFO 级别记录重要状态变化
         
-        # 通过事件系统发出心情变化的通知
-        self.event_system.emit('pet_mood_changed', {
-            'character_name': self.pet.pet_type, # 当前宠物的角色类型
-            'previous_mood': prev_mood.value,    # 改变前的心情
-            'current_mood': mood.value         # 改变后的当前心情
-        })
+        # 通过事件系统发出心情变化的通知 (set_state 内部引起的变化会合并到 pet_state_changed 中)
+        if _emit:
+            self._emit_changed('mood', _MOOD_NAMES[prev_mood], _MOOD_NAMES[mood])
         # 注意：通常单纯改变心情不会立即触发新的动画播放，
         # 心情更多是作为一种状态，影响后续动作动画的选择 (如果动画资源支持按心情区分) 或宠物的其他行为。
 # 在 core/pet/controller.py 的 PetController 类中
@@ -125,23 +196,34 @@ class PetController:
 # class PetController:
 # ... (其他方法如 __init__, _register_events, set_mood, _clear_temporary_action 等应已存在) ...
 
-    def set_action(self, action: ActionType, duration: Optional[float] = None) -> None: #
+    def set_action(self, action: ActionType, duration: Optional[float] = None, force: bool = False, *, _emit: bool = True) -> None: #
         """
         设置宠物当前的主要动作，并发出事件通知UI层播放对应动画。
         如果提供了 duration，则该动作被视为临时动作，其结束将由 
         `update_pet_stats_periodically` 方法在后续的周期性检查中处理。
-        
+
+        本方法也会在按键钩子线程、活动追踪线程中被调用，'ui_play_animation' 事件因此可能从非GUI线程发出。
+        EventSystem.emit 不加锁 (监听器元组整体替换)，PetWindow 收到事件后自行调度到GUI线程处理。
+
         Args:
             action: 新的动作 (ActionType 枚举成员)。
             duration: 此动作的持续时间（秒）。如果为 None，则该动作为持续性动作。
+            force: 为 True 时即使动作未改变也重新发出 'ui_play_animation' (例如程序启动时播放初始动画)。
+            _emit: 内部使用。为 False 时不发出 pet_action_changed (由 set_state 合并发出)；'ui_play_animation' 照常发出。
         """
         # 1. 参数类型检查，确保传入的是有效的 ActionType
         if not isinstance(action, ActionType): #
             logger.warning(f"PetController: 尝试设置无效的动作类型: {action}。将使用默认 ActionType.IDLE。") #
             action = ActionType.IDLE # # 如果无效，回退到 IDLE
+        action_name = _ACTION_NAMES[action] # 动作名在下面的日志和事件数据中多次使用，只取一次
+
+        # 动作未变、不是临时动作且当前也没有临时动作时，UI 已在播放该动画，无需重新发出事件
+        if not force and duration is None and action is self.pet.current_action and self._temporary_action_info is None:
+            logger.debug("PetController: 动作已经是 '%s'，跳过。", action_name)
+            return
 
         # 2. 记录日志，说明请求设置的动作和持续时间
-        logger.debug(f"PetController: 请求设置新动作 '{action.value}' (持续时间: {duration if duration is not None else '永久'})。") #
+        logger.debug("PetController: 请求设置新动作 '%s' (持续时间: %s)。", action_name, duration if duration is not None else '永久') #
         
         # 3. 清除之前可能存在的任何临时动作的计时信息
         #    这是因为新的动作指令（无论是否临时）应该覆盖旧的临时状态。
@@ -151,48 +233,44 @@ class PetController:
 
         # 4. 更新宠物模型中的当前动作
         self.pet.current_action = action #
+        self._stats_dirty = True # 同上，动作变化也合并到下一次 pet_stats_updated 中
 
         # 5. 记录动作变化日志
         #    只有当动作真正发生改变时，才打印主要的INFO级别日志；
         #    如果只是重新设置相同的动作（例如为了从头播放），可以使用DEBUG级别或稍微不同的措辞。
         if prev_action != action: #
-            logger.info(f"PetController: 宠物 '{self.pet.name}' 动作从 '{prev_action.value}' 变为 '{action.value}'。") #
+            logger.info("PetController: 宠物 '%s' 动作从 '%s' 变为 '%s'。", self.pet.name, _ACTION_NAMES[prev_action], action_name) #
         else:
             # 如果动作未变，但仍然调用了 set_action，可能是为了确保UI刷新或从特定帧开始
-            logger.info(f"PetController: 宠物 '{self.pet.name}' 重新确认/刷新动作为 '{action.value}'。") #
+            logger.info("PetController: 宠物 '%s' 重新确认/刷新动作为 '%s'。", self.pet.name, action_name) #
         
         # 6. 准备并发出 'ui_play_animation' 事件，通知 PetWindow 播放动画
         event_data_for_ui = { #
             'character_name': self.pet.pet_type,    # 当前宠物的角色名/类型
-            'action_name': action.value,            # 要播放的动作的名称 (与动画文件夹名对应)
-            'mood_name': self.pet.mood.value        # 当前心情 (UI层可选，用于选择动画变种)
+            'action_name': action_name,            # 要播放的动作的名称 (与动画文件夹名对应)
+            'mood_name': _MOOD_NAMES[self.pet.mood]        # 当前心情 (UI层可选，用于选择动画变种)
         } #
-        # 使用 INFO 级别确保这些关键的通信日志能被看到
-        logger.info(f"PetController: PRE-EMIT 'ui_play_animation' 事件，数据: {event_data_for_ui} (来自线程: {threading.current_thread().name})") #
+        # 发出前后的通信日志只在 DEBUG 开启时记录，避免每次动作切换都格式化事件数据并查询当前线程
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("PetController: PRE-EMIT 'ui_play_animation' 事件，数据: %s (来自线程: %s)", event_data_for_ui, threading.current_thread().name) #
         if self.event_system: # 确保 event_system 存在
             self.event_system.emit('ui_play_animation', event_data_for_ui) #
-            logger.info(f"PetController: POST-EMIT 'ui_play_animation' 事件 for action '{action.value}' (来自线程: {threading.current_thread().name})") #
+            if debug_enabled:
+                logger.debug("PetController: POST-EMIT 'ui_play_animation' 事件 for action '%s' (来自线程: %s)", action_name, threading.current_thread().name) #
         else:
             logger.error("PetController: EventSystem 未初始化，无法发出 'ui_play_animation' 事件！")
 
         # 7. (可选) 触发一个更通用的“宠物动作已改变”事件，供其他模块监听
-        if prev_action != action: # 只在动作实际改变时发出
-            if self.event_system: #
-                self.event_system.emit('pet_action_changed', { #
-                    'character_name': self.pet.pet_type, #
-                    'previous_action': prev_action.value, #
-                    'current_action': action.value #
-                }) #
+        if _emit and prev_action != action: # 只在动作实际改变时发出
+            self._emit_changed('action', _ACTION_NAMES[prev_action], action_name) #
         
         # 8. 如果为这个新设置的动作提供了有效的持续时间 (duration > 0)
         #    则记录这个临时动作的信息，它的结束将由 update_pet_stats_periodically 方法来检查和处理。
         if duration is not None and duration > 0: #
-            self._temporary_action_info = { #
-                'action': action, # 记录是哪个动作是临时的
-                'end_time': time.time() + duration # 计算并记录这个临时动作的预计结束时间戳
-            } #
-            logger.info(f"PetController: 动作 '{action.value}' 被设置为临时动作，将在约 {duration:.2f} 秒后由周期性更新检查并恢复到 IDLE。") #
-        # 注意：这里没有了创建和启动 threading.Timer 的代码。
+            # 记录是哪个动作是临时的，以及它的预计结束时间戳
+            self._temporary_action_info = (action, time.monotonic() + duration) #
+            logger.info("PetController: 动作 '%s' 被设置为临时动作，将在约 %.2f 秒后由周期性更新检查并恢复到 IDLE。", action_name, duration) #
         
     def set_state(self, state: StateType) -> None: #
         """
@@ -209,54 +287,73 @@ class PetController:
 
         prev_state = self.pet.state # 获取之前的状态
         if prev_state == state: # 如果请求设置的状态与当前状态相同
-            logger.debug(f"PetController: 宠物 '{self.pet.name}' 已处于状态 '{state.value}'。")
+            logger.debug("PetController: 宠物 '%s' 已处于状态 '%s'。", self.pet.name, _STATE_NAMES[state])
             # 即使状态相同，也检查一下当前动作是否是该状态应有的默认主要动作。
             # 如果不是 (例如，之前是一个临时动作)，则强制设置回该状态的默认动作。
-            current_default_action_for_state = None
-            if state == StateType.IDLE: current_default_action_for_state = ActionType.IDLE #
-            elif state == StateType.WORKING: current_default_action_for_state = ActionType.WORK #
-            elif state == StateType.SLEEPING: current_default_action_for_state = ActionType.SLEEP #
+            current_default_action_for_state = _STATE_DEFAULT_ACTIONS.get(state)
 
             if current_default_action_for_state and self.pet.current_action != current_default_action_for_state:
-                logger.info(f"PetController: 状态 '{state.value}' 未变，但当前动作 '{self.pet.current_action.value}' 不是默认动作，强制恢复为 '{current_default_action_for_state.value}'。")
+                logger.info("PetController: 状态 '%s' 未变，但当前动作 '%s' 不是默认动作，强制恢复为 '%s'。", _STATE_NAMES[state], _ACTION_NAMES[self.pet.current_action], _ACTION_NAMES[current_default_action_for_state])
                 self.set_action(current_default_action_for_state)
             return # 状态未改变，或者已处理了动作恢复，则直接返回
 
         self.pet.state = state # 更新宠物模型中的状态
-        logger.info(f"PetController: 宠物 '{self.pet.name}' 状态从 '{prev_state.value}' 变为 '{state.value}'。")
-        
-        # 通过事件系统发出状态变化的通知
-        self.event_system.emit('pet_state_changed', {
-            'character_name': self.pet.pet_type,
-            'previous_state': prev_state.value,
-            'current_state': state.value
-        })
-        
-        # --- 根据新进入的状态，设置对应的心情和主要动作 ---
-        if state == StateType.WORKING: #
-            # 进入工作状态时的逻辑
-            if self.pet.energy > 70: self.set_mood(MoodType.HAPPY) #
-            elif self.pet.energy < 30: self.set_mood(MoodType.TIRED) #
-            else: self.set_mood(MoodType.NORMAL) #
-            self.set_action(ActionType.WORK) # # 播放工作/打字动画
-        
-        elif state == StateType.IDLE: #
-            # 进入空闲状态时的逻辑
-            if self.pet.energy > 70 and self.pet.happiness > 60:
-                self.set_mood(MoodType.PLAYFUL) #
-                # 随机播放一个“玩耍”的临时动画，持续3到7秒
-                self.set_action(ActionType.PLAY, duration=random.uniform(3.0, 7.0)) #
-            elif self.pet.energy < 30 :
-                self.set_mood(MoodType.TIRED) #
-                self.set_action(ActionType.REST) # # 播放休息动画 (可能是持续的，直到状态改变)
-            else:
-                self.set_mood(MoodType.RELAXED) #
-                self.set_action(ActionType.IDLE) # # 播放标准的空闲动画
-        
-        elif state == StateType.SLEEPING: #
-            # 进入睡眠状态时的逻辑
-            self.set_mood(MoodType.SLEEPY) # # 设置为困倦的心情
-            self.set_action(ActionType.SLEEP) # # 播放睡觉动画
+        self._stats_dirty = True
+        prev_state_name = _STATE_NAMES[prev_state] # 状态名在日志和事件数据中都要用到，各取一次
+        state_name = _STATE_NAMES[state]
+        logger.info(f"PetController: 宠物 '{self.pet.name}' 状态从 '{prev_state_name}' 变为 '{state_name}'。")
+        prev_mood = self.pet.mood
+        prev_action = self.pet.current_action
+        
+        # --- 根据新进入的状态，设置对应的心情和主要动作 (按状态查表分派) ---
+        # 期间产生的心情/动作变化不单独发出事件，而是合并到下面的 pet_state_changed 中
+        enter_state_handler = self._STATE_ENTER_HANDLERS.get(state)
+        if enter_state_handler:
+            enter_state_handler(self)
+        
+        # 通过事件系统发出一次状态变化的通知，包含本次转换中状态、心情和动作的前后值 (没有监听者时跳过)
+        if self.event_system.has_listeners('pet_state_changed'):
+            self.event_system.emit('pet_state_changed', {
+                'character_name': self.pet.pet_type,
+                'previous_state': prev_state_name,
+                'current_state': state_name,
+                'previous_mood': _MOOD_NAMES[prev_mood],
+                'current_mood': _MOOD_NAMES[self.pet.mood],
+                'previous_action': _ACTION_NAMES[prev_action],
+                'current_action': _ACTION_NAMES[self.pet.current_action]
+            })
+    
+    def _enter_working_state(self) -> None:
+        """进入工作状态时的逻辑"""
+        if self.pet.energy > 70: self.set_mood(MoodType.HAPPY, _emit=False) #
+        elif self.pet.energy < 30: self.set_mood(MoodType.TIRED, _emit=False) #
+        else: self.set_mood(MoodType.NORMAL, _emit=False) #
+        self.set_action(ActionType.WORK, _emit=False) # # 播放工作/打字动画
+    
+    def _enter_idle_state(self) -> None:
+        """进入空闲状态时的逻辑"""
+        if self.pet.energy > 70 and self.pet.happiness > 60:
+            self.set_mood(MoodType.PLAYFUL, _emit=False) #
+            # 随机播放一个“玩耍”的临时动画，持续3到7秒
+            self.set_action(ActionType.PLAY, duration=self._rng.uniform(3.0, 7.0), _emit=False) #
+        elif self.pet.energy < 30 :
+            self.set_mood(MoodType.TIRED, _emit=False) #
+            self.set_action(ActionType.REST, _emit=False) # # 播放休息动画 (可能是持续的，直到状态改变)
+        else:
+            self.set_mood(MoodType.RELAXED, _emit=False) #
+            self.set_action(ActionType.IDLE, _emit=False) # # 播放标准的空闲动画
+    
+    def _enter_sleeping_state(self) -> None:
+        """进入睡眠状态时的逻辑"""
+        self.set_mood(MoodType.SLEEPY, _emit=False) # # 设置为困倦的心情
+        self.set_action(ActionType.SLEEP, _emit=False) # # 播放睡觉动画
+    
+    # 状态 -> 进入该状态时执行的处理函数
+    _STATE_ENTER_HANDLERS = {
+        StateType.WORKING: _enter_working_state,
+        StateType.IDLE: _enter_idle_state,
+        StateType.SLEEPING: _enter_sleeping_state,
+    }
     
 # 在 core/pet/controller.py 的 PetController 类中
 
@@ -265,98 +362,191 @@ class PetController:
         周期性地被调用（例如由 main.py 中的 QTimer）。
         1. 检查并处理是否有已到期的临时动作，并恢复到IDLE状态。
         2. 根据 state_update_interval，更新宠物的核心内部属性（如能量、快乐值等）。
+        3. 如果属性自上次通知后有变化，发出一次 pet_stats_updated 事件。
         """
-        current_time = time.time() # 获取当前时间戳
+        current_time = time.monotonic() # 获取当前单调时钟时间戳
+        # 配置被修改或重新加载过时，重新读取缓存的配置项
+        self._refresh_tunables()
 
         # --- 第一部分：检查并处理到期的临时动作 ---
         # 这个检查应该在每次 update_pet_stats_periodically被调用时都执行，
         # 以确保临时动作的恢复能够及时响应。
-        if self._temporary_action_info and current_time >= self._temporary_action_info['end_time']:
-            action_that_was_temporary = self._temporary_action_info['action']
-            logger.info(f"PetController (Periodic Update): 检测到临时动作 '{action_that_was_temporary.value}' 已到期，准备恢复到 IDLE。")
+        # set_action 也会在按键钩子线程、活动追踪线程中被调用，这里只读取一次快照，
+        # 避免检查与取值之间该属性被其他线程清除。
+        temporary_action_info = self._temporary_action_info
+        if temporary_action_info and current_time >= temporary_action_info[1]:
+            original_temporary_action = temporary_action_info[0]
+            logger.info("PetController (Periodic Update): 检测到临时动作 '%s' 已到期，准备恢复到 IDLE。", _ACTION_NAMES[original_temporary_action])
             
-            original_temporary_action = self._temporary_action_info['action']
             self._clear_temporary_action() # 清除临时动作信息，必须在 set_action 之前
-            
-            # 只有当宠物的当前动作仍然是那个刚刚到期的临时动作时，才执行恢复
-            if self.pet.current_action == original_temporary_action:
-                self.set_action(ActionType.IDLE) # 调用 set_action 将动作恢复到 IDLE
-            else:
-                logger.info(f"PetController (Periodic Update): 临时动作 '{original_temporary_action.value}' 的恢复被忽略，因为当前动作已变为 '{self.pet.current_action.value}'。")
+            self._restore_if_unchanged(original_temporary_action)
         
         # --- 第二部分：执行周期性的核心属性更新 ---
         # 这部分逻辑基于 self.state_update_interval (例如，每10秒执行一次)
-        if current_time - self.last_state_update >= self.state_update_interval:
-            self.last_state_update = current_time # 更新上次执行核心属性更新的时间戳
+        if current_time >= self._next_state_update:
+            self._next_state_update = current_time + self.state_update_interval # 推迟到下一个更新周期
             
-            logger.debug(f"PetController: 执行核心宠物属性更新。当前状态: {self.pet.state.value}, 能量: {self.pet.energy}, 快乐: {self.pet.happiness}")
-
-            # 根据当前宠物的主要状态，调整能量和快乐值等属性
-            if self.pet.state == StateType.WORKING:
-                self.pet.energy = max(0, self.pet.energy - self.config.get_setting('pet.decay_rates.energy_working', 2))
-                self.pet.happiness = max(0, self.pet.happiness - self.config.get_setting('pet.decay_rates.happiness_working', 1))
-            elif self.pet.state == StateType.IDLE:
-                self.pet.energy = min(100, self.pet.energy + self.config.get_setting('pet.regen_rates.energy_idle', 1))
-                if self.pet.mood == MoodType.PLAYFUL:
-                    self.pet.happiness = min(100, self.pet.happiness + 1)
-                else:
-                    self.pet.happiness = max(0, self.pet.happiness - self.config.get_setting('pet.decay_rates.happiness_idle', 0.5))
-            elif self.pet.state == StateType.SLEEPING:
-                self.pet.energy = min(100, self.pet.energy + self.config.get_setting('pet.regen_rates.energy_sleeping', 5))
-                self.pet.happiness = min(100, self.pet.happiness + self.config.get_setting('pet.regen_rates.happiness_sleeping', 2))
+            logger.debug("PetController: 执行核心宠物属性更新。当前状态: %s, 能量: %s, 快乐: %s", _STATE_NAMES[self.pet.state], self.pet.energy, self.pet.happiness)
+
+            # 根据当前宠物的主要状态，调整能量和快乐值等属性 (按状态查表分派)
+            stat_updater = self._STATE_STAT_UPDATERS.get(self.pet.state)
+            if stat_updater:
+                stat_updater(self)
             
             # 根据更新后的属性值，重新评估并设置宠物的心情
             self._update_mood_based_on_stats() #
             
             # 检查是否有因属性变化而需要触发的特殊行为
-            low_energy_threshold = self.config.get_setting('pet.thresholds.low_energy', 20) #
+            low_energy_threshold = self._threshold_low_energy #
             if self.pet.energy < low_energy_threshold and self.pet.state == StateType.WORKING: #
                 if self.pet.current_action != ActionType.ALERT: #
-                    logger.info(f"PetController: 宠物 '{self.pet.name}' 能量过低 ({self.pet.energy})，触发 ALERT 动作。") #
-                    self.set_action(ActionType.ALERT, duration=self.config.get_setting('pet.durations.alert_low_energy', 5.0)) #
+                    logger.info("PetController: 宠物 '%s' 能量过低 (%s)，触发 ALERT 动作。", self.pet.name, self.pet.energy) #
+                    self.set_action(ActionType.ALERT, duration=self._duration_alert_low_energy) #
                 self.event_system.emit('pet_alert', {  #
                     'type': 'low_energy', 
                     'message': f'{self.pet.name}感觉能量不足，建议休息一下！', 
                     'energy_level': self.pet.energy 
                 })
             
-            logger.debug(f"PetController: 宠物属性更新后: 状态={self.pet.state.value}, 心情={self.pet.mood.value}, 能量={self.pet.energy}, 快乐={self.pet.happiness}") #
-            # 发出一个通用的宠物属性已更新的事件
-            self.event_system.emit('pet_stats_updated', self.pet.to_dict()) #
+            logger.debug("PetController: 宠物属性更新后: 状态=%s, 心情=%s, 能量=%s, 快乐=%s", _STATE_NAMES[self.pet.state], _MOOD_NAMES[self.pet.mood], self.pet.energy, self.pet.happiness) #
+            # 标记属性已更新，由本方法末尾统一发出 pet_stats_updated 事件
+            self._stats_dirty = True
+        
+        # --- 第三部分：合并发出属性更新事件 ---
+        # 周期更新和交互期间的属性变化只做标记，每个周期最多发出一次事件，UI 刷新频率不受点击频率影响
+        if self._stats_dirty:
+            self._stats_dirty = False
+            if self.event_system.has_listeners('pet_stats_updated'): # 只有存在监听者时才构造属性字典
+                # 只读视图：属性未变化时复用同一份字典，监听者不应修改事件数据
+                self.event_system.emit('pet_stats_updated', self.pet.as_mapping()) #
+
+    def _update_stats_working(self) -> None:
+        """工作状态下的周期属性变化：能量和快乐值下降"""
+        self._add_energy(-self._decay_energy_working)
+        self._add_happiness(-self._decay_happiness_working)
+
+    def _update_stats_idle(self) -> None:
+        """空闲状态下的周期属性变化：恢复能量，玩耍时快乐值上升，否则缓慢下降"""
+        self._add_energy(self._regen_energy_idle)
+        if self.pet.mood == MoodType.PLAYFUL:
+            self._add_happiness(1)
+        else:
+            self._add_happiness(-self._decay_happiness_idle)
+
+    def _update_stats_sleeping(self) -> None:
+        """睡眠状态下的周期属性变化：恢复能量和快乐值"""
+        self._add_energy(self._regen_energy_sleeping)
+        self._add_happiness(self._regen_happiness_sleeping)
+
+    # 状态 -> 周期属性更新时执行的处理函数
+    _STATE_STAT_UPDATERS = {
+        StateType.WORKING: _update_stats_working,
+        StateType.IDLE: _update_stats_idle,
+        StateType.SLEEPING: _update_stats_sleeping,
+    }
+
+    def _restore_if_unchanged(self, expected: ActionType) -> None:
+        """
+        临时动作到期后恢复到 IDLE。
+        只有当宠物的当前动作仍然是那个刚刚到期的临时动作时，才执行恢复。
+        """
+        if self.pet.current_action == expected:
+            self.set_action(ActionType.IDLE) # 调用 set_action 将动作恢复到 IDLE
+        else:
+            logger.info("PetController (Periodic Update): 临时动作 '%s' 的恢复被忽略，因为当前动作已变为 '%s'。", _ACTION_NAMES[expected], _ACTION_NAMES[self.pet.current_action])
+
+    def _load_tunables(self) -> None:
+        """
+        将热路径 (周期更新、心情判定、按键处理、点击/喂食交互) 上用到的配置项一次性读入实例属性，
+        避免每个周期、每次按键或点击都查询 ConfigManager。
+        """
+        get_setting = self.config.get_setting
+        # 周期性属性变化速率
+        self._decay_energy_working = get_setting('pet.decay_rates.energy_working', 2)
+        self._decay_happiness_working = get_setting('pet.decay_rates.happiness_working', 1)
+        self._decay_happiness_idle = get_setting('pet.decay_rates.happiness_idle', 0.5)
+        self._regen_energy_idle = get_setting('pet.regen_rates.energy_idle', 1)
+        self._regen_energy_sleeping = get_setting('pet.regen_rates.energy_sleeping', 5)
+        self._regen_happiness_sleeping = get_setting('pet.regen_rates.happiness_sleeping', 2)
+        # 低能量提醒
+        self._threshold_low_energy = get_setting('pet.thresholds.low_energy', 20)
+        self._duration_alert_low_energy = get_setting('pet.durations.alert_low_energy', 5.0)
+        # 心情判定阈值
+        self._threshold_energy_tired = get_setting('pet.thresholds.energy_tired', 20)
+        self._threshold_happiness_sad = get_setting('pet.thresholds.happiness_sad', 30)
+        self._threshold_energy_happy_excited = get_setting('pet.thresholds.energy_happy_excited', 80)
+        self._threshold_happiness_happy_excited = get_setting('pet.thresholds.happiness_happy_excited', 70)
+        self._threshold_energy_normal = get_setting('pet.thresholds.energy_normal', 60)
+        self._threshold_happiness_normal = get_setting('pet.thresholds.happiness_normal', 50)
+        # 按键反应
+        self._keypress_reaction_interval = get_setting('pet.intervals.keypress_reaction', 50)
+        self._keypress_reaction_chance = get_setting('pet.chances.keypress_reaction', 0.1)
+        self._keypress_reaction_min = get_setting('pet.durations.keypress_reaction_min', 1.5)
+        self._keypress_reaction_max = get_setting('pet.durations.keypress_reaction_max', 3.0)
+        # 配置中的反应动作名只在这里转换一次为 ActionType，无效的名称在加载时记录并丢弃
+        keypress_reactions = []
+        for reaction_action_str in get_setting('pet.reactions.on_keypress', _DEFAULT_KEYPRESS_REACTIONS) or ():
+            reaction_action = _ACTION_BY_NAME.get(str(reaction_action_str).upper())
+            if reaction_action is None:
+                logger.warning(f"PetController: 配置的按键反应动作 '{reaction_action_str}' 不是有效的 ActionType。")
+            else:
+                keypress_reactions.append(reaction_action)
+        self._keypress_reactions: Tuple[ActionType, ...] = tuple(keypress_reactions)
+        # 点击和喂食交互
+        self._gain_happiness_on_click = get_setting('pet.gains.happiness_on_click', 2)
+        self._duration_react_min = get_setting('pet.durations.react_min', 1.0)
+        self._duration_react_max = get_setting('pet.durations.react_max', 2.5)
+        self._gain_energy_on_feed = get_setting('pet.gains.energy_on_feed', 20)
+        self._gain_happiness_on_feed = get_setting('pet.gains.happiness_on_feed', 10)
+        self._duration_eat = get_setting('pet.durations.eat', 3.0)
+        
+        self._tunables_version = getattr(self.config, 'settings_version', None)
+
+    def _refresh_tunables(self) -> None:
+        """配置版本号变化 (设置被修改或重新加载) 时重新读取缓存的配置项，并丢弃由配置构建的对话表"""
+        if getattr(self.config, 'settings_version', None) != self._tunables_version:
+            self._load_tunables()
+            # 对话库可能也被修改，下次获取消息时重新展开并解析回退链
+            self._dialogue_table = None
+            self._dialogue_options = {}
+
+    def _add_energy(self, delta: float) -> None:
+        """调整宠物能量，结果限制在 0~100 之间"""
+        energy = self.pet.energy + delta
+        self.pet.energy = 0 if energy < 0 else 100 if energy > 100 else energy
+
+    def _add_happiness(self, delta: float) -> None:
+        """调整宠物快乐值，结果限制在 0~100 之间"""
+        happiness = self.pet.happiness + delta
+        self.pet.happiness = 0 if happiness < 0 else 100 if happiness > 100 else happiness
 
     def _update_mood_based_on_stats(self) -> None:
         """根据当前的能量和快乐值等核心属性来更新宠物的心情。"""
-        # 这是一个示例性的心情判定逻辑，你可以根据需要设计得更复杂或从配置加载规则
-        # 读取配置中的阈值，如果配置中没有则使用默认值
-        threshold_energy_tired = self.config.get_setting('pet.thresholds.energy_tired', 20)
-        threshold_happiness_sad = self.config.get_setting('pet.thresholds.happiness_sad', 30)
-        threshold_energy_happy_excited = self.config.get_setting('pet.thresholds.energy_happy_excited', 80)
-        threshold_happiness_happy_excited = self.config.get_setting('pet.thresholds.happiness_happy_excited', 70)
-        threshold_energy_normal = self.config.get_setting('pet.thresholds.energy_normal', 60)
-        threshold_happiness_normal = self.config.get_setting('pet.thresholds.happiness_normal', 50)
-
-        new_mood = self.pet.mood # 默认为当前心情，只有在满足条件时才改变
-
-        if self.pet.energy < threshold_energy_tired:
-            new_mood = MoodType.TIRED #
-        elif self.pet.happiness < threshold_happiness_sad:
-            new_mood = MoodType.SAD #
-        elif self.pet.energy > threshold_energy_happy_excited and self.pet.happiness > threshold_happiness_happy_excited:
-            if self.pet.state == StateType.WORKING: #
-                new_mood = MoodType.EXCITED # # 工作时精力充沛且开心 -> 兴奋
-            else:
-                new_mood = MoodType.HAPPY #
-        elif self.pet.energy > threshold_energy_normal and self.pet.happiness > threshold_happiness_normal:
-             # 只有当心情不是更负面的时候才变为NORMAL，避免覆盖TIRED或SAD
-            if self.pet.mood not in [MoodType.TIRED, MoodType.SAD]: #
-                 new_mood = MoodType.NORMAL #
-        else: 
-            # 其他一些中间状态，如果不是特别负面，也倾向于NORMAL
-            if self.pet.mood not in [MoodType.TIRED, MoodType.SAD, MoodType.SLEEPY]: #
-                 new_mood = MoodType.NORMAL #
-        
-        if self.pet.mood != new_mood: # 只有当计算出的新心情与当前不同时才调用set_mood
+        pet = self.pet
+        new_mood = self._compute_mood(pet.energy, pet.happiness, pet.state, pet.mood)
+        if new_mood is not pet.mood: # 只有当计算出的新心情与当前不同时才调用set_mood (枚举成员可直接比较身份)
             self.set_mood(new_mood)
+
+    def _compute_mood(self, energy: float, happiness: float, state: StateType, current_mood: MoodType) -> MoodType:
+        """
+        根据属性值计算宠物应有的心情，不修改任何状态。
+        这是一个示例性的心情判定逻辑，阈值由 _load_tunables 从配置中读取 (配置中没有则使用默认值)。
+        
+        Returns:
+            新的心情；没有满足任何条件时返回 current_mood。
+        """
+        if energy < self._threshold_energy_tired:
+            return MoodType.TIRED #
+        if happiness < self._threshold_happiness_sad:
+            return MoodType.SAD #
+        if energy > self._threshold_energy_happy_excited and happiness > self._threshold_happiness_happy_excited:
+            # 工作时精力充沛且开心 -> 兴奋
+            return MoodType.EXCITED if state == StateType.WORKING else MoodType.HAPPY #
+        if energy > self._threshold_energy_normal and happiness > self._threshold_happiness_normal:
+            # 只有当心情不是更负面的时候才变为NORMAL，避免覆盖TIRED或SAD
+            return current_mood if current_mood in _NEGATIVE_MOODS else MoodType.NORMAL #
+        # 其他一些中间状态，如果不是特别负面，也倾向于NORMAL
+        return current_mood if current_mood in _NEGATIVE_OR_SLEEPY_MOODS else MoodType.NORMAL #
     
     # --- 事件处理方法 ---
     # 下面的 _on_... 方法是各种事件的处理器，它们会根据事件类型和当前状态来调用 set_state, set_mood, set_action
@@ -369,7 +559,7 @@ class PetController:
         
         # 初始进入工作状态时，可以根据配置概率性地播放一个鼓励动画
         chance_encourage = self.config.get_setting('pet.chances.encourage_on_work_start', 0.4) # 例如40%概率
-        if random.random() < chance_encourage:
+        if self._rng.random() < chance_encourage:
             duration_encourage = self.config.get_setting('pet.durations.encourage_work_start', 3.0)
             self.set_action(ActionType.ENCOURAGE, duration=duration_encourage) #
         # else: set_state(StateType.WORKING) 内部已经根据能量等设置了心情和 ActionType.WORK 动作
@@ -415,36 +605,37 @@ class PetController:
         """当检测到键盘按键时调用。"""
         # 如果宠物在睡觉，任何按键都可能是一个唤醒信号 (但实际状态转换应由活动追踪器判断用户是否真的回来了)
         if self.pet.state == StateType.SLEEPING: #
-            logger.debug(f"PetController: 按键事件发生在宠物睡眠期间。发送 user_activity_resumed 事件。")
+            logger.debug("PetController: 按键事件发生在宠物睡眠期间。发送 user_activity_resumed 事件。")
             # 发出一个通用事件，表示用户可能有活动了，让其他逻辑（如 ActivityTracker 或状态机本身）判断是否需要唤醒宠物
             self.event_system.emit('user_activity_resumed', {'source': 'keypress_during_sleep'})
             return # 睡眠时不进行下面的概率性互动
 
-        # 如果宠物正在工作，根据配置的概率和按键次数触发短期互动动画
-        if self.pet.state == StateType.WORKING: #
-            # keypress 事件通常由 keylogger.py 发出，其中可能包含 'count' (当日总按键数)
-            # 或 'burst_count' (短期内的按键数) 等信息。这里我们假设它有 'count'。
-            keypress_total_count = event_data.get('count', 0) 
-            
-            reaction_interval = self.config.get_setting('pet.intervals.keypress_reaction', 50) # 每多少次按键检查一次
-            reaction_chance = self.config.get_setting('pet.chances.keypress_reaction', 0.1)   # 触发反应的概率
-            
-            if keypress_total_count > 0 and reaction_interval > 0 and keypress_total_count % reaction_interval == 0:
-                if random.random() < reaction_chance:
-                    # 从配置或一个预定义的列表中选择一个随机的短期互动动作
-                    possible_reactions = self.config.get_setting('pet.reactions.on_keypress', ['SURPRISED', 'HAPPY', 'ENCOURAGE'])
-                    # 将字符串转换为 ActionType 枚举成员
-                    reaction_action_str = random.choice(possible_reactions)
-                    try:
-                        chosen_reaction_action = ActionType[reaction_action_str.upper()] #
-                        duration = random.uniform(
-                            self.config.get_setting('pet.durations.keypress_reaction_min', 1.5),
-                            self.config.get_setting('pet.durations.keypress_reaction_max', 3.0)
-                        )
-                        logger.debug(f"PetController: 按键计数达到 {keypress_total_count}，触发随机反应动作: {chosen_reaction_action.value}，持续 {duration:.1f}s。")
-                        self.set_action(chosen_reaction_action, duration=duration)
-                    except KeyError:
-                        logger.warning(f"PetController: 配置的按键反应动作 '{reaction_action_str}' 不是有效的 ActionType。")
+        # 只有宠物正在工作时，才根据配置的概率和按键次数触发短期互动动画
+        if self.pet.state != StateType.WORKING: #
+            return
+
+        # keypress 事件由 keylogger.py 按批次发出，包含 'count' (当日总按键数)
+        # 和 'batch' (距上一次事件累计的按键数)。
+        keypress_total_count = event_data.get('count', 0) 
+        reaction_interval = self._keypress_reaction_interval # 每多少次按键检查一次
+        if keypress_total_count <= 0 or reaction_interval <= 0:
+            return
+        
+        # 本批次按键没有跨过 reaction_interval 的整数倍时直接返回 (绝大多数事件走这里)
+        keypress_batch = event_data.get('batch', 1)
+        if (keypress_total_count - keypress_batch) // reaction_interval == keypress_total_count // reaction_interval:
+            return
+        
+        possible_reactions = self._keypress_reactions # 已在加载配置时转换为 ActionType 元组
+        reaction_chance = self._keypress_reaction_chance   # 触发反应的概率
+        if not possible_reactions or self._rng.random() >= reaction_chance:
+            return
+        
+        # 随机选择一个短期互动动作
+        chosen_reaction_action = possible_reactions[self._rng.randrange(len(possible_reactions))]
+        duration = self._rng.uniform(self._keypress_reaction_min, self._keypress_reaction_max)
+        logger.debug("PetController: 按键计数达到 %d，触发随机反应动作: %s，持续 %.1fs。", keypress_total_count, _ACTION_NAMES[chosen_reaction_action], duration)
+        self.set_action(chosen_reaction_action, duration=duration)
     
     def _on_achievement_unlocked(self, event_data: Dict[str, Any]) -> None:
         """当用户解锁成就时调用。"""
@@ -468,50 +659,78 @@ class PetController:
             event_data (dict): 事件数据，应包含 'type' (例如 'click')。
         """
         interaction_type = event_data.get('type', '') # 获取交互类型
-        logger.info(f"PetController: 收到宠物交互事件 - 类型: '{interaction_type}' 来自角色 '{event_data.get('character_name', self.pet.pet_type)}'")
+        character_name = event_data.get('character_name') # 交互针对的角色，只取一次
+        logger.info(f"PetController: 收到宠物交互事件 - 类型: '{interaction_type}' 来自角色 '{character_name if character_name is not None else self.pet.pet_type}'")
 
         # 确保交互是针对当前 PetController 管理的宠物角色
-        if event_data.get('character_name') != self.pet.pet_type:
-            logger.debug(f"PetController: 交互事件针对角色 '{event_data.get('character_name')}'，但当前控制器管理的是 '{self.pet.pet_type}'。忽略。")
+        if character_name != self.pet.pet_type:
+            logger.debug("PetController: 交互事件针对角色 '%s'，但当前控制器管理的是 '%s'。忽略。", character_name, self.pet.pet_type)
             return
 
-        if interaction_type == 'click':
-            # 如果宠物当前正在睡觉，点击会尝试唤醒它
-            if self.pet.state == StateType.SLEEPING: #
-                logger.info(f"PetController: 点击事件，宠物 '{self.pet.name}' 从睡眠中被唤醒。")
-                self.set_state(StateType.IDLE) # # 转换到空闲状态（这会触发对应的默认动作和心情）
-            else: 
-                # 如果宠物不是在睡觉，被点击了就给一个反应
-                # 随机决定是惊讶还是顽皮的心情
-                new_mood_on_click = MoodType.SURPRISED if random.random() < 0.5 else MoodType.PLAYFUL #
-                self.set_mood(new_mood_on_click)
-                
-                # 播放一个持续时间随机的 REACT 动作动画
-                react_duration = random.uniform(
-                    self.config.get_setting('pet.durations.react_min', 1.0),
-                    self.config.get_setting('pet.durations.react_max', 2.5)
-                )
-                logger.info(f"PetController: 点击交互，宠物 '{self.pet.name}' 将播放 REACT 动作，持续 {react_duration:.2f} 秒。")
-                self.set_action(ActionType.REACT, duration=react_duration) #
-                
-                # 点击宠物可以稍微增加一点快乐值
-                self.pet.happiness = min(100, self.pet.happiness + self.config.get_setting('pet.gains.happiness_on_click', 2))
-        
-        elif interaction_type == 'feed': # 假设未来有喂食交互
-            if self.pet.state != StateType.SLEEPING: # # 睡觉的时候不能喂食
-                logger.info(f"PetController: 宠物 '{self.pet.name}' 被喂食。")
-                self.set_mood(MoodType.HAPPY) #
-                self.set_action(ActionType.EAT, duration=self.config.get_setting('pet.durations.eat', 3.0)) #
-                # 喂食会增加能量和快乐值
-                self.pet.energy = min(100, self.pet.energy + self.config.get_setting('pet.gains.energy_on_feed', 20))
-                self.pet.happiness = min(100, self.pet.happiness + self.config.get_setting('pet.gains.happiness_on_feed', 10))
-            else:
-                logger.info(f"PetController: 宠物 '{self.pet.name}' 正在睡觉，不能被打扰吃东西。")
-        
-        # 在处理完交互后，重新评估心情（因为属性可能已改变）
+        # 按 (当前状态, 交互类型) 查表分派；处理函数负责在属性变化后确定最终心情
+        interaction_handler = self._INTERACTION_HANDLERS.get((self.pet.state, interaction_type))
+        if interaction_handler:
+            interaction_handler(self)
+        else:
+            # 未知的交互类型：仍然重新评估一次心情
+            self._update_mood_based_on_stats()
+        # 标记属性已更新，pet_stats_updated 事件由下一次 update_pet_stats_periodically 合并发出，以便UI等可以刷新显示
+        self._stats_dirty = True
+
+    def _set_mood_after_stat_change(self, interaction_mood: MoodType) -> None:
+        """
+        交互改变属性后，以交互带来的心情为起点，按属性只计算一次最终心情并设置。
+        避免先设置交互心情、再由 _update_mood_based_on_stats 覆盖而产生两次心情变化。
+        """
+        pet = self.pet
+        self.set_mood(self._compute_mood(pet.energy, pet.happiness, pet.state, interaction_mood))
+
+    def _handle_click_wake(self) -> None:
+        """处理宠物睡觉时的点击：唤醒宠物"""
+        logger.info(f"PetController: 点击事件，宠物 '{self.pet.name}' 从睡眠中被唤醒。")
+        self.set_state(StateType.IDLE) # # 转换到空闲状态（这会触发对应的默认动作和心情）
+        # 进入空闲状态后，根据属性重新评估心情
+        self._update_mood_based_on_stats()
+
+    def _handle_click_interaction(self) -> None:
+        """处理点击宠物的交互 (宠物未在睡觉)"""
+        # 被点击了就给一个反应
+        # 随机决定是惊讶还是顽皮的心情
+        new_mood_on_click = MoodType.SURPRISED if self._rng.random() < 0.5 else MoodType.PLAYFUL #
+        
+        # 点击宠物可以稍微增加一点快乐值
+        self._add_happiness(self._gain_happiness_on_click)
+        # 快乐值变化后一次性确定心情，再播放动作，动画事件中携带的就是最终心情
+        self._set_mood_after_stat_change(new_mood_on_click)
+        
+        # 播放一个持续时间随机的 REACT 动作动画
+        react_duration = self._rng.uniform(self._duration_react_min, self._duration_react_max)
+        logger.info(f"PetController: 点击交互，宠物 '{self.pet.name}' 将播放 REACT 动作，持续 {react_duration:.2f} 秒。")
+        self.set_action(ActionType.REACT, duration=react_duration) #
+    
+    def _handle_feed_interaction(self) -> None:
+        """处理喂食交互 (假设未来有喂食交互)"""
+        logger.info(f"PetController: 宠物 '{self.pet.name}' 被喂食。")
+        # 喂食会增加能量和快乐值
+        self._add_energy(self._gain_energy_on_feed)
+        self._add_happiness(self._gain_happiness_on_feed)
+        self._set_mood_after_stat_change(MoodType.HAPPY)
+        self.set_action(ActionType.EAT, duration=self._duration_eat) #
+    
+    def _handle_feed_while_sleeping(self) -> None:
+        """睡觉的时候不能喂食"""
+        logger.info(f"PetController: 宠物 '{self.pet.name}' 正在睡觉，不能被打扰吃东西。")
         self._update_mood_based_on_stats()
-        # 并发出宠物属性更新事件，以便UI等可以刷新显示
-        self.event_system.emit('pet_stats_updated', self.pet.to_dict()) #
+    
+    # (状态, 交互类型) -> 处理函数
+    _INTERACTION_HANDLERS = {
+        (StateType.SLEEPING, 'click'): _handle_click_wake,
+        (StateType.IDLE, 'click'): _handle_click_interaction,
+        (StateType.WORKING, 'click'): _handle_click_interaction,
+        (StateType.SLEEPING, 'feed'): _handle_feed_while_sleeping,
+        (StateType.IDLE, 'feed'): _handle_feed_interaction,
+        (StateType.WORKING, 'feed'): _handle_feed_interaction,
+    }
 
     
     def get_random_message(self, context: Optional[str] = None) -> str:
@@ -526,7 +745,7 @@ class PetController:
             str: 一条随机选择的对话文本。
         """
         personality = self.pet.personality
-        mood_value = self.pet.mood.value # 获取心情的字符串值，例如 "happy", "normal"
+        mood_value = _MOOD_NAMES[self.pet.mood] # 获取心情的字符串值，例如 "happy", "normal"
         
         # 尝试从配置中获取对话库 (settings.yaml -> pet_dialogues)
         # 期望的对话库结构示例:
@@ -540,32 +759,55 @@ class PetController:
         #       normal: ["继续加油，你做的很好！"]
         #   shy:
         #     # ...
-        dialogue_library = self.config.get_setting('pet_dialogues', {})
-        
-        # 逐级获取消息列表
-        messages_for_personality = dialogue_library.get(personality, {})
-        
-        # 优先使用带上下文和心情的消息
-        options = messages_for_personality.get(context, {}).get(mood_value, [])
+        # 回退链的解析结果按 (personality, context, mood) 缓存，重复请求只需一次字典查找
+        options_key = (personality, context, mood_value)
+        options = self._dialogue_options.get(options_key)
+        if options is None:
+            options = self._dialogue_options[options_key] = self._resolve_dialogue_options(personality, context, mood_value)
+        return options[self._rng.randrange(len(options))]
+
+    def _resolve_dialogue_options(self, personality: str, context: Optional[str], mood_value: str) -> Tuple[str, ...]:
+        """
+        按回退顺序查找 (性格, 上下文, 心情) 对应的候选消息，总是返回非空元组。
+        """
+        dialogue_table = self._get_dialogue_table()
         
-        # 如果没有特定心情的消息，尝试该上下文的通用消息
-        if not options:
-            options = messages_for_personality.get(context, {}).get('any_mood', []) # 'any_mood' 作为回退
+        # 优先使用带上下文和心情的消息，其次是该上下文的通用消息 ('any_mood' 作为回退)
+        options = dialogue_table.get((personality, context, mood_value)) or \
+                  dialogue_table.get((personality, context, 'any_mood'))
             
         # 如果连上下文的通用消息也没有，尝试该性格的通用闲聊消息
         if not options:
             general_context = 'general_idle' if context != 'general_idle' else 'default_fallback'
-            options = messages_for_personality.get(general_context, {}).get(mood_value, [])
-            if not options:
-                options = messages_for_personality.get(general_context, {}).get('any_mood', [])
+            options = dialogue_table.get((personality, general_context, mood_value)) or \
+                      dialogue_table.get((personality, general_context, 'any_mood'))
 
         # 如果还是没有，使用一个非常通用的回退
         if not options:
-            fallback_dialogues = self.config.get_setting('pet_dialogues.default_fallback.any_mood.any_mood', 
-                                                        [f"{self.pet.name}正在思考...", "...", "嗯？"])
-            options = fallback_dialogues
+            options = dialogue_table.get(('default_fallback', 'any_mood', 'any_mood')) or \
+                      (f"{self.pet.name}正在思考...", "...", "嗯？")
             
-        return random.choice(options) if options else f"{self.pet.name}不知道说什么了。"
+        return options
+
+    def _get_dialogue_table(self) -> Dict[Tuple[str, Optional[str], str], Tuple[str, ...]]:
+        """
+        将配置中三层嵌套的对话库展开为以 (personality, context, mood) 为键的扁平字典，
+        只在首次调用时构建，之后直接复用。空的消息列表不会进入表中。
+        """
+        if self._dialogue_table is None:
+            table = {}
+            dialogue_library = self.config.get_setting('pet_dialogues', {}) or {}
+            for personality, contexts in dialogue_library.items():
+                if not isinstance(contexts, dict):
+                    continue
+                for context, moods in contexts.items():
+                    if not isinstance(moods, dict):
+                        continue
+                    for mood, messages in moods.items():
+                        if messages:
+                            table[(personality, context, mood)] = tuple(messages)
+            self._dialogue_table = table
+        return self._dialogue_table
 
 
     def get_pet_data_for_ui(self) -> Dict[str, Any]:
@@ -575,14 +817,14 @@ class PetController:
         return {
             "name": self.pet.name,
             "character_type": self.pet.pet_type,
-            "state": self.pet.state.value,
-            "action": self.pet.current_action.value,
-            "mood": self.pet.mood.value,
+            "state": _STATE_NAMES[self.pet.state],
+            "action": _ACTION_NAMES[self.pet.current_action],
+            "mood": _MOOD_NAMES[self.pet.mood],
             "energy": self.pet.energy,
             "happiness": self.pet.happiness
         }
 
     def shutdown(self):
-        """在程序退出前，清理所有活动的定时器。"""
-        logger.info(f"PetController for '{self.pet.name}' 正在关闭，清理动作定时器...")
+        """在程序退出前，清除尚未到期的临时动作 (只有一个槽位，清除是 O(1) 且不阻塞的)。"""
+        logger.info(f"PetController for '{self.pet.name}' 正在关闭，清除临时动作...")
         self._clear_temporary_action()
\ No newline at end of file
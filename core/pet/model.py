@@ -2,7 +2,8 @@
 
 import logging
 from enum import Enum
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -43,10 +44,73 @@ class StateType(Enum): #
     WORKING = "working"    # 编程中
     SLEEPING = "sleeping"  # 睡眠中
 
+# 字符串值 -> 枚举成员 的查找表，反序列化时用一次字典查找代替 Enum 的 __call__
+_STATE_BY_VALUE = {state.value: state for state in StateType}
+_MOOD_BY_VALUE = {mood.value: mood for mood in MoodType}
+_ACTION_BY_VALUE = {action.value: action for action in ActionType}
+
+# 各心情对应的心情数值 (0-100)，未列出的心情按 60 计算
+_MOOD_VALUES = {
+    MoodType.HAPPY: 90,
+    MoodType.PLAYFUL: 85,
+    MoodType.EXCITED: 80,
+    MoodType.RELAXED: 70,
+    MoodType.NORMAL: 60,
+    MoodType.SLEEPY: 40,
+    MoodType.TIRED: 30,
+    MoodType.SAD: 20
+}
+# 如果 MoodType 中加入了 SURPRISED，你可能也想在这里给它一个数值
+# 例如: MoodType.SURPRISED: 75 (可以根据需要调整)
+
+# 每级升级所需经验值 = 当前等级 * EXP_PER_LEVEL
+EXP_PER_LEVEL = 200
+
+def _apply_exp(level: int, exp: int, amount: int) -> Tuple[int, int, bool]:
+    """
+    在局部变量上计算增加经验后的等级和经验值，超出升级所需的经验会保留到下一级，
+    一次获得大量经验时可以连续升多级
+    
+    Returns:
+        (新等级, 新经验值, 是否升级) 的元组
+    """
+    exp += amount
+    leveled_up = False
+    exp_needed = level * EXP_PER_LEVEL
+    while exp >= exp_needed:
+        exp -= exp_needed
+        level += 1
+        exp_needed += EXP_PER_LEVEL
+        leveled_up = True
+    return level, exp, leveled_up
+
+# to_dict 中序列化的字段，修改其中任意一个都会使缓存的字典失效
+_SERIALIZED_FIELDS = frozenset((
+    'name', 'pet_type', 'personality', 'state', 'mood', 'current_action',
+    'energy', 'happiness', 'hygiene', 'social', 'exp', 'level',
+    'unlocked_appearances', 'current_appearance', 'animation_speed',
+))
+
 # ... (PetModel 类定义) ...
 class PetModel: #
     """宠物数据模型，存储宠物的状态和属性"""
     
+    # 属性集合固定，使用 __slots__ 省去每个实例的 __dict__；新增属性时需要同步加到这里 (以及 _SERIALIZED_FIELDS)
+    __slots__ = (
+        '_dict_cache',
+        'name', 'pet_type', 'personality',
+        'state', 'mood', 'current_action',
+        'energy', 'happiness', 'hygiene', 'social',
+        'exp', 'level',
+        'unlocked_appearances', 'current_appearance',
+        'animation_speed',
+    )
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _SERIALIZED_FIELDS:
+            super().__setattr__('_dict_cache', None) # 序列化字段被修改，下次 to_dict 时重新构建
+    
     def __init__(self, name: str = "皮皮", pet_type: str = "cat", personality: str = "cheerful"): #
         """
         初始化宠物模型
@@ -56,6 +120,9 @@ class PetModel: #
             pet_type: 宠物类型（如cat, dog, penguin等）
             personality: 宠物性格（如cheerful, shy, quirky等）
         """
+        # to_dict 结果的缓存，序列化字段变化时由 __setattr__ 清空
+        self._dict_cache: Optional[dict] = None
+        
         # 基本信息
         self.name = name #
         self.pet_type = pet_type #
@@ -95,18 +162,14 @@ class PetModel: #
         Returns:
             是否升级
         """
-        self.exp += amount #
-        
-        # 检查是否达到升级条件
-        exp_needed = self.level * 200  # 每级需要的经验值 #
-        
-        if self.exp >= exp_needed: #
-            self.level += 1 #
-            self.exp = 0  # 重置经验值 #
+        level, exp, leveled_up = _apply_exp(self.level, self.exp, amount)
+        # 只在最后各写回一次，避免循环中每次赋值都经过 __setattr__
+        self.exp = exp #
+        if leveled_up: #
+            self.level = level #
             logger.info(f"宠物 {self.name} 升级到 {self.level} 级") #
-            return True #
         
-        return False #
+        return leveled_up #
     
     def get_mood_value(self) -> int: #
         """
@@ -115,21 +178,8 @@ class PetModel: #
         Returns:
             心情数值
         """
-        # 根据不同心情返回不同数值
-        mood_values = { #
-            MoodType.HAPPY: 90, #
-            MoodType.PLAYFUL: 85, #
-            MoodType.EXCITED: 80, #
-            MoodType.RELAXED: 70, #
-            MoodType.NORMAL: 60, #
-            MoodType.SLEEPY: 40, #
-            MoodType.TIRED: 30, #
-            MoodType.SAD: 20 #
-        }
-        # 如果 MoodType 中加入了 SURPRISED，你可能也想在这里给它一个数值
-        # 例如: MoodType.SURPRISED: 75 (可以根据需要调整)
-        
-        return mood_values.get(self.mood, 60) #
+        # 根据不同心情返回不同数值 (查模块级的 _MOOD_VALUES 表)
+        return _MOOD_VALUES.get(self.mood, 60) #
     
     def unlock_appearance(self, appearance_id: str) -> bool: #
         """
@@ -143,6 +193,7 @@ class PetModel: #
         """
         if appearance_id not in self.unlocked_appearances: #
             self.unlocked_appearances.append(appearance_id) #
+            self._dict_cache = None # 原地修改列表不会经过 __setattr__，手动使缓存失效
             logger.info(f"宠物 {self.name} 解锁新外观: {appearance_id}") #
             return True #
         
@@ -170,8 +221,29 @@ class PetModel: #
         将宠物模型转换为字典，用于序列化
         
         Returns:
-            表示宠物的字典
+            表示宠物的字典 (每次返回新的副本，调用方可以自由修改)
         """
+        return dict(self._get_dict_cache())
+    
+    def as_mapping(self) -> Mapping[str, Any]:
+        """
+        返回宠物数据的只读视图，属性未变化时重复调用不会重新构建字典。
+        用于事件通知等只读取数据的场景；需要可修改的字典时请使用 to_dict。
+        
+        Returns:
+            表示宠物的只读映射
+        """
+        return MappingProxyType(self._get_dict_cache())
+    
+    def _get_dict_cache(self) -> dict:
+        """返回缓存的序列化字典，缓存失效时重新构建"""
+        cached = self._dict_cache
+        if cached is None:
+            cached = self._dict_cache = self._build_dict()
+        return cached
+    
+    def _build_dict(self) -> dict:
+        """根据当前属性构建序列化字典"""
         return { #
             'name': self.name, #
             'pet_type': self.pet_type, #
@@ -207,30 +279,41 @@ class PetModel: #
             personality=data.get('personality', 'cheerful') #
         )
         
-        # 设置状态和行为
-        try: #
-            pet.state = StateType(data.get('state', 'idle')) #
-            pet.mood = MoodType(data.get('mood', 'normal')) #
-            pet.current_action = ActionType(data.get('current_action', 'idle')) #
-        except ValueError as e: #
-            logger.error(f"从字典加载状态错误: {e}") #
-            # 使用默认值
+        # 新建实例的 _dict_cache 本来就是 None，以下字段直接经 object.__setattr__ 写入，
+        # 跳过 PetModel.__setattr__ 中逐字段的缓存失效判断
+        set_field = object.__setattr__
+        
+        # 设置状态和行为 (按字符串值查表，无效的值记录错误并使用默认值)
+        state_value = data.get('state', 'idle') #
+        mood_value = data.get('mood', 'normal') #
+        action_value = data.get('current_action', 'idle') #
+        state = _STATE_BY_VALUE.get(state_value)
+        mood = _MOOD_BY_VALUE.get(mood_value)
+        current_action = _ACTION_BY_VALUE.get(action_value)
+        if state is None or mood is None or current_action is None:
+            logger.error(f"从字典加载状态错误: state={state_value!r}, mood={mood_value!r}, current_action={action_value!r} 中存在无效值") #
+        if state is not None:
+            set_field(pet, 'state', state)
+        if mood is not None:
+            set_field(pet, 'mood', mood)
+        if current_action is not None:
+            set_field(pet, 'current_action', current_action)
         
         # 设置属性值
-        pet.energy = data.get('energy', 100) #
-        pet.happiness = data.get('happiness', 60) #
-        pet.hygiene = data.get('hygiene', 80) #
-        pet.social = data.get('social', 50) #
+        set_field(pet, 'energy', data.get('energy', 100)) #
+        set_field(pet, 'happiness', data.get('happiness', 60)) #
+        set_field(pet, 'hygiene', data.get('hygiene', 80)) #
+        set_field(pet, 'social', data.get('social', 50)) #
         
         # 设置经验和等级
-        pet.exp = data.get('exp', 0) #
-        pet.level = data.get('level', 1) #
+        set_field(pet, 'exp', data.get('exp', 0)) #
+        set_field(pet, 'level', data.get('level', 1)) #
         
         # 设置外观
-        pet.unlocked_appearances = data.get('unlocked_appearances', ["default"]) #
-        pet.current_appearance = data.get('current_appearance', "default") #
+        set_field(pet, 'unlocked_appearances', data.get('unlocked_appearances', ["default"])) #
+        set_field(pet, 'current_appearance', data.get('current_appearance', "default")) #
         
         # 设置动画属性
-        pet.animation_speed = data.get('animation_speed', 5) #
+        set_field(pet, 'animation_speed', data.get('animation_speed', 5)) #
         
         return pet #
\ No newline at end of file
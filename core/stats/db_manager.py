@@ -6,14 +6,170 @@
 """
 
 import os
+import atexit
 import sqlite3
 import logging
+import threading
 import json
 from datetime import datetime, date
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
+
+# orjson 为可选依赖，可用时用于加速统计数据中 JSON 字段的读写
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# msgpack 为可选依赖，可用时设置值以二进制 BLOB 保存，编码和解析都比 JSON 文本更快
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+
+def json_dumps(obj: Any) -> str:
+    """
+    将对象序列化为JSON字符串，优先使用 orjson。
+    与 json.dumps 一样，非字符串的字典键 (如按小时统计的整数键) 会被转换为字符串。
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass  # orjson 不支持的类型 (例如超过64位的整数)，交给 json 模块处理
+    return json.dumps(obj)
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """解析JSON字符串，优先使用 orjson (解析失败时抛出 json.JSONDecodeError 或其子类)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _pack_setting(value: Any) -> Union[str, bytes]:
+    """
+    将设置值编码为存入 settings.value 列的形式：msgpack 可用时为二进制，
+    否则沿用旧格式 (字符串原样保存，其他值转为JSON字符串)
+    """
+    if msgpack is not None:
+        try:
+            return msgpack.packb(value, use_bin_type=True)
+        except (TypeError, ValueError, OverflowError):
+            pass  # msgpack 不支持的值，退回到 JSON 文本
+    return value if isinstance(value, str) else json_dumps(value)
+
+
+def _unpack_setting(value: Union[str, bytes]) -> Any:
+    """
+    解析 settings.value 列中的值：BLOB 按 msgpack 解码，
+    TEXT 为旧格式，尝试按JSON解析，失败时原样返回字符串
+    """
+    if isinstance(value, bytes):
+        if msgpack is not None:
+            return msgpack.unpackb(value, raw=False, strict_map_key=False)
+        logger.warning("设置值为 msgpack 格式，但未安装 msgpack，返回原始数据")
+        return value
+    try:
+        return json_loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return value
+
+# daily_stats 中以 JSON 字符串保存的字段
+_DAY_STATS_JSON_FIELDS = ('app_breakdown', 'hourly_breakdown', 'top_keys', 'achievements')
+
+# 区分 "字段不存在" 与 "字段值为 None" 的哨兵对象
+_MISSING = object()
+
+
+def _dump_json_fields(stats: Dict[str, Any]) -> None:
+    """
+    将 stats 中尚未序列化的 JSON 字段原地转换为字符串。
+    调用方已传入字符串 (如 StatsLogger 预先序列化的字段) 时只做一次类型判断，不再重复序列化。
+    """
+    for field in _DAY_STATS_JSON_FIELDS:
+        value = stats.get(field, _MISSING)
+        if value is not _MISSING and not isinstance(value, str):
+            stats[field] = json_dumps(value)
+
+# 数据库操作使用的 SQL 语句，集中定义为常量，每次调用都是同一语句文本，可以命中连接的语句缓存
+_STATEMENT_CACHE_SIZE = 256
+
+# 三个表都以文本主键查询，使用 WITHOUT ROWID 让主键索引本身就是表 (只对新建的表生效)
+_SQL_CREATE_TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        date TEXT PRIMARY KEY,
+        total_time REAL,
+        keypress_count INTEGER,
+        app_breakdown TEXT,
+        hourly_breakdown TEXT,
+        top_keys TEXT,
+        start_mood TEXT,
+        end_mood TEXT,
+        achievements TEXT,
+        goals_met BOOLEAN,
+        notes TEXT
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS achievements (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        description TEXT,
+        icon TEXT,
+        unlock_date TEXT,
+        conditions TEXT
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value BLOB,
+        updated_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+    ) WITHOUT ROWID
+    ''',
+)
+
+# 日期已存在时就地更新该行 (UPSERT，需要 SQLite 3.24+)，插入和更新共用一条语句
+_SQL_INSERT_DAY_STATS = '''
+INSERT INTO daily_stats (
+    date, total_time, keypress_count, app_breakdown,
+    hourly_breakdown, top_keys, start_mood, end_mood,
+    achievements, goals_met, notes
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(date) DO UPDATE SET
+    total_time = excluded.total_time,
+    keypress_count = excluded.keypress_count,
+    app_breakdown = excluded.app_breakdown,
+    hourly_breakdown = excluded.hourly_breakdown,
+    top_keys = excluded.top_keys,
+    start_mood = excluded.start_mood,
+    end_mood = excluded.end_mood,
+    achievements = excluded.achievements,
+    goals_met = excluded.goals_met,
+    notes = excluded.notes
+'''
+_SQL_SAVE_ACHIEVEMENT = '''
+INSERT OR REPLACE INTO achievements (
+    id, name, description, icon, unlock_date, conditions
+) VALUES (?, ?, ?, ?, ?, ?)
+'''
+# 更新时间由 SQLite 在写入时生成 (本地时间，精确到毫秒)，不必在 Python 中构造时间戳；
+# 直接写在 VALUES 中而不依赖列默认值，对默认值出现之前建立的旧表同样有效
+_SQL_SAVE_SETTING = '''
+INSERT OR REPLACE INTO settings (key, value, updated_at)
+VALUES (?, ?, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))
+'''
+_SQL_SELECT_DAY_STATS = 'SELECT * FROM daily_stats WHERE date = ?'
+_SQL_SELECT_DAY_STATS_RANGE = 'SELECT * FROM daily_stats WHERE date BETWEEN ? AND ? ORDER BY date'
+_SQL_COUNT_DAYS = 'SELECT COUNT(*) FROM daily_stats'
+_SQL_SELECT_ACHIEVEMENT = 'SELECT * FROM achievements WHERE id = ?'
+_SQL_SELECT_ALL_ACHIEVEMENTS = 'SELECT * FROM achievements ORDER BY unlock_date'
+_SQL_SELECT_SETTING = 'SELECT value FROM settings WHERE key = ?'
+_SQL_DELETE_SETTING = 'DELETE FROM settings WHERE key = ?'
+
 class DatabaseManager:
     """
     SQLite数据库管理器，负责数据库操作和维护
@@ -28,20 +184,29 @@ class DatabaseManager:
         """
         self.db_path = db_path
         
+        # 每个线程复用一个长期打开的连接，避免每次操作都重新连接并设置 PRAGMA
+        # (同一连接上的事务不能在多个线程间交错，因此按线程保存)
+        self._local = threading.local()
+        # 所有已打开的连接，供 close() 统一关闭
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
         # 确保数据目录存在
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         # 测试数据库连接并初始化
         self._test_connection()
+        
+        # 兜底：即使拥有者没有显式调用 close()，退出时也关闭连接并截断 WAL 文件
+        atexit.register(self.close)
     
     def _test_connection(self) -> None:
         """测试数据库连接并初始化"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA foreign_keys = ON")
-            conn.commit()
-            conn.close()
+            conn, cursor = self._get_connection()
+            # WAL 模式写入数据库文件后持久生效，只需设置一次；
+            # 提交时不再每次 fsync 整个数据库，读写也不会互相阻塞
+            cursor.execute("PRAGMA journal_mode = WAL")
             logger.debug(f"数据库连接测试成功: {self.db_path}")
         except sqlite3.Error as e:
             logger.error(f"数据库连接测试失败: {e}", exc_info=True)
@@ -49,70 +214,65 @@ class DatabaseManager:
     
     def _get_connection(self) -> Tuple[sqlite3.Connection, sqlite3.Cursor]:
         """
-        获取数据库连接和游标
+        获取当前线程的数据库连接和一个新游标，连接在首次使用时创建，之后一直复用
         
         Returns:
             数据库连接和游标对象的元组
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 让结果以字典形式返回
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA foreign_keys = ON")
-        return conn, cursor
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # 连接只在创建它的线程中执行语句；关闭 check_same_thread 只是为了让 close() 能在其他线程中关闭它
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=_STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row  # 让结果以字典形式返回
+            # 以下 PRAGMA 只对当前连接有效，在创建连接时设置一次
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")  # WAL 模式下只在检查点时 fsync
+            conn.execute("PRAGMA temp_store = MEMORY")
+            conn.execute("PRAGMA cache_size = -20000")  # 约 20MB 页缓存
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn, conn.cursor()
+    
+    def close(self) -> None:
+        """
+        关闭所有线程 (包括活动追踪、键盘记录等后台线程) 打开的数据库连接，在程序退出前调用。
+        关闭前执行一次 WAL 检查点，把 WAL 中的内容写回数据库文件并截断 WAL。
+        调用时其他线程不应再访问数据库；重复调用是安全的。
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        if connections:
+            try:
+                connections[0].execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logger.warning(f"WAL 检查点执行失败: {e}")
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"关闭数据库连接失败: {e}")
+        # 当前线程之后再次使用时会重新建立连接；其他线程持有的已关闭连接同样需要丢弃
+        self._local = threading.local()
+        logger.debug("数据库连接已关闭")
     
     def create_tables_if_not_exist(self) -> None:
         """创建必要的数据表（如果不存在）"""
         conn, cursor = self._get_connection()
         
         try:
-            # 每日统计表
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS daily_stats (
-                date TEXT PRIMARY KEY,
-                total_time REAL,
-                keypress_count INTEGER,
-                app_breakdown TEXT,
-                hourly_breakdown TEXT,
-                top_keys TEXT,
-                start_mood TEXT,
-                end_mood TEXT,
-                achievements TEXT,
-                goals_met BOOLEAN,
-                notes TEXT
-            )
-            ''')
-            
-            # 成就表
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS achievements (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                description TEXT,
-                icon TEXT,
-                unlock_date TEXT,
-                conditions TEXT
-            )
-            ''')
-            
-            # 设置表
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT,
-                updated_at TEXT
-            )
-            ''')
+            # 每日统计表、成就表、设置表
+            for create_sql in _SQL_CREATE_TABLES:
+                cursor.execute(create_sql)
             
             conn.commit()
             logger.debug("已创建数据库表")
         except sqlite3.Error as e:
             logger.error(f"创建数据库表失败: {e}", exc_info=True)
-        finally:
-            conn.close()
     
     def insert_day_stats(self, stats: Dict[str, Any]) -> bool:
         """
-        插入每日统计数据
+        插入每日统计数据，该日期已有记录时更新这条记录
         
         Args:
             stats: 统计数据字典
@@ -120,47 +280,56 @@ class DatabaseManager:
         Returns:
             操作是否成功
         """
+        return self.insert_day_stats_many([stats])
+    
+    def insert_day_stats_many(self, stats_list: List[Dict[str, Any]]) -> bool:
+        """
+        批量插入每日统计数据 (日期已存在的行会被更新)，所有行在同一个事务中用 executemany 写入，
+        任意一行失败时整体回滚
+        
+        Args:
+            stats_list: 统计数据字典列表
+            
+        Returns:
+            操作是否成功
+        """
+        if not stats_list:
+            return True
+        
         conn, cursor = self._get_connection()
         
         try:
-            # 序列化JSON字段，如果它们不是字符串
-            for field in ['app_breakdown', 'hourly_breakdown', 'top_keys', 'achievements']:
-                if field in stats and not isinstance(stats[field], str):
-                    stats[field] = json.dumps(stats[field])
+            params = []
+            for stats in stats_list:
+                _dump_json_fields(stats)
+                params.append((
+                    stats.get('date'),
+                    stats.get('total_time', 0),
+                    stats.get('keypress_count', 0),
+                    stats.get('app_breakdown', '{}'),
+                    stats.get('hourly_breakdown', '{}'),
+                    stats.get('top_keys', '{}'),
+                    stats.get('start_mood', 'normal'),
+                    stats.get('end_mood'),
+                    stats.get('achievements', '[]'),
+                    stats.get('goals_met', False),
+                    stats.get('notes', '')
+                ))
             
-            cursor.execute('''
-            INSERT INTO daily_stats (
-                date, total_time, keypress_count, app_breakdown, 
-                hourly_breakdown, top_keys, start_mood, end_mood,
-                achievements, goals_met, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                stats.get('date'),
-                stats.get('total_time', 0),
-                stats.get('keypress_count', 0),
-                stats.get('app_breakdown', '{}'),
-                stats.get('hourly_breakdown', '{}'),
-                stats.get('top_keys', '{}'),
-                stats.get('start_mood', 'normal'),
-                stats.get('end_mood'),
-                stats.get('achievements', '[]'),
-                stats.get('goals_met', False),
-                stats.get('notes', '')
-            ))
+            cursor.executemany(_SQL_INSERT_DAY_STATS, params)
             
             conn.commit()
-            logger.debug(f"插入日期 {stats.get('date')} 的统计数据")
+            logger.debug(f"插入/更新 {len(params)} 条每日统计数据 (首个日期: {stats_list[0].get('date')})")
             return True
         except sqlite3.Error as e:
             conn.rollback()
             logger.error(f"插入统计数据失败: {e}", exc_info=True)
             return False
-        finally:
-            conn.close()
     
     def update_day_stats(self, stats: Dict[str, Any]) -> bool:
         """
-        更新每日统计数据
+        更新每日统计数据 (已废弃，保留为 insert_day_stats 的别名；
+        insert_day_stats 在日期已存在时会直接更新该行)
         
         Args:
             stats: 统计数据字典
@@ -168,50 +337,7 @@ class DatabaseManager:
         Returns:
             操作是否成功
         """
-        conn, cursor = self._get_connection()
-        
-        try:
-            # 序列化JSON字段，如果它们不是字符串
-            for field in ['app_breakdown', 'hourly_breakdown', 'top_keys', 'achievements']:
-                if field in stats and not isinstance(stats[field], str):
-                    stats[field] = json.dumps(stats[field])
-            
-            cursor.execute('''
-            UPDATE daily_stats SET
-                total_time = ?,
-                keypress_count = ?,
-                app_breakdown = ?,
-                hourly_breakdown = ?,
-                top_keys = ?,
-                start_mood = ?,
-                end_mood = ?,
-                achievements = ?,
-                goals_met = ?,
-                notes = ?
-            WHERE date = ?
-            ''', (
-                stats.get('total_time', 0),
-                stats.get('keypress_count', 0),
-                stats.get('app_breakdown', '{}'),
-                stats.get('hourly_breakdown', '{}'),
-                stats.get('top_keys', '{}'),
-                stats.get('start_mood', 'normal'),
-                stats.get('end_mood'),
-                stats.get('achievements', '[]'),
-                stats.get('goals_met', False),
-                stats.get('notes', ''),
-                stats.get('date')
-            ))
-            
-            conn.commit()
-            logger.debug(f"更新日期 {stats.get('date')} 的统计数据")
-            return True
-        except sqlite3.Error as e:
-            conn.rollback()
-            logger.error(f"更新统计数据失败: {e}", exc_info=True)
-            return False
-        finally:
-            conn.close()
+        return self.insert_day_stats(stats)
     
     def get_day_stats(self, date_str: str) -> Optional[Dict[str, Any]]:
         """
@@ -226,7 +352,7 @@ class DatabaseManager:
         conn, cursor = self._get_connection()
         
         try:
-            cursor.execute('SELECT * FROM daily_stats WHERE date = ?', (date_str,))
+            cursor.execute(_SQL_SELECT_DAY_STATS, (date_str,))
             row = cursor.fetchone()
             
             if row:
@@ -235,8 +361,6 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logger.error(f"获取日期 {date_str} 的统计数据失败: {e}", exc_info=True)
             return None
-        finally:
-            conn.close()
     
     def get_stats_range(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """
@@ -249,21 +373,35 @@ class DatabaseManager:
         Returns:
             统计数据字典列表
         """
+        return list(self.iter_stats_range(start_date, end_date))
+    
+    def iter_stats_range(self, start_date: str, end_date: str, raw: bool = False) -> Iterator[Any]:
+        """
+        逐行迭代日期范围内的统计数据，按需从游标读取，不会一次性把所有行复制到列表中
+        
+        Args:
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)
+            raw: 为True时直接产出按表列顺序排列的元组，省去构造字典的开销
+            
+        Yields:
+            统计数据字典 (raw为True时为元组)
+        """
         conn, cursor = self._get_connection()
+        if raw:
+            cursor.row_factory = None  # 只影响这个游标，连接上的其他游标仍返回 sqlite3.Row
         
         try:
-            cursor.execute(
-                'SELECT * FROM daily_stats WHERE date BETWEEN ? AND ? ORDER BY date',
-                (start_date, end_date)
-            )
-            rows = cursor.fetchall()
-            
-            return [dict(row) for row in rows]
+            cursor.execute(_SQL_SELECT_DAY_STATS_RANGE, (start_date, end_date))
+            if raw:
+                yield from cursor
+            else:
+                for row in cursor:
+                    yield dict(row)
         except sqlite3.Error as e:
             logger.error(f"获取日期范围 {start_date} 到 {end_date} 的统计数据失败: {e}", exc_info=True)
-            return []
         finally:
-            conn.close()
+            cursor.close()
     
     def get_total_days(self) -> int:
         """
@@ -275,14 +413,12 @@ class DatabaseManager:
         conn, cursor = self._get_connection()
         
         try:
-            cursor.execute('SELECT COUNT(*) FROM daily_stats')
+            cursor.execute(_SQL_COUNT_DAYS)
             count = cursor.fetchone()[0]
             return count
         except sqlite3.Error as e:
             logger.error(f"获取总记录天数失败: {e}", exc_info=True)
             return 0
-        finally:
-            conn.close()
     
     def save_achievement(self, achievement: Dict[str, Any]) -> bool:
         """
@@ -294,35 +430,48 @@ class DatabaseManager:
         Returns:
             操作是否成功
         """
+        return self.save_achievements_many([achievement])
+    
+    def save_achievements_many(self, achievements: List[Dict[str, Any]]) -> bool:
+        """
+        在同一个事务中批量保存成就信息
+        
+        Args:
+            achievements: 成就数据列表
+            
+        Returns:
+            操作是否成功
+        """
+        if not achievements:
+            return True
+        
         conn, cursor = self._get_connection()
         
         try:
-            # 序列化条件字段，如果它不是字符串
-            if 'conditions' in achievement and not isinstance(achievement['conditions'], str):
-                achievement['conditions'] = json.dumps(achievement['conditions'])
+            now_iso = datetime.now().isoformat()  # 未指定解锁时间的成就共用同一时间戳
+            params = []
+            for achievement in achievements:
+                # 序列化条件字段，如果它不是字符串
+                if 'conditions' in achievement and not isinstance(achievement['conditions'], str):
+                    achievement['conditions'] = json_dumps(achievement['conditions'])
+                params.append((
+                    achievement.get('id'),
+                    achievement.get('name', ''),
+                    achievement.get('description', ''),
+                    achievement.get('icon', ''),
+                    achievement.get('unlock_date', now_iso),
+                    achievement.get('conditions', '{}')
+                ))
             
-            cursor.execute('''
-            INSERT OR REPLACE INTO achievements (
-                id, name, description, icon, unlock_date, conditions
-            ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                achievement.get('id'),
-                achievement.get('name', ''),
-                achievement.get('description', ''),
-                achievement.get('icon', ''),
-                achievement.get('unlock_date', datetime.now().isoformat()),
-                achievement.get('conditions', '{}')
-            ))
+            cursor.executemany(_SQL_SAVE_ACHIEVEMENT, params)
             
             conn.commit()
-            logger.debug(f"保存成就 {achievement.get('id')}")
+            logger.debug(f"保存 {len(params)} 个成就 (首个: {achievements[0].get('id')})")
             return True
         except sqlite3.Error as e:
             conn.rollback()
             logger.error(f"保存成就失败: {e}", exc_info=True)
             return False
-        finally:
-            conn.close()
     
     def get_achievement(self, achievement_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -337,7 +486,7 @@ class DatabaseManager:
         conn, cursor = self._get_connection()
         
         try:
-            cursor.execute('SELECT * FROM achievements WHERE id = ?', (achievement_id,))
+            cursor.execute(_SQL_SELECT_ACHIEVEMENT, (achievement_id,))
             row = cursor.fetchone()
             
             if row:
@@ -346,8 +495,6 @@ class DatabaseManager:
         except sqlite3.Error as e:
             logger.error(f"获取成就 {achievement_id} 失败: {e}", exc_info=True)
             return None
-        finally:
-            conn.close()
     
     def get_all_achievements(self) -> List[Dict[str, Any]]:
         """
@@ -359,15 +506,13 @@ class DatabaseManager:
         conn, cursor = self._get_connection()
         
         try:
-            cursor.execute('SELECT * FROM achievements ORDER BY unlock_date')
+            cursor.execute(_SQL_SELECT_ALL_ACHIEVEMENTS)
             rows = cursor.fetchall()
             
             return [dict(row) for row in rows]
         except sqlite3.Error as e:
             logger.error(f"获取所有成就失败: {e}", exc_info=True)
             return []
-        finally:
-            conn.close()
     
     def save_setting(self, key: str, value: Any) -> bool:
         """
@@ -375,36 +520,44 @@ class DatabaseManager:
         
         Args:
             key: 设置键
-            value: 设置值（将被转换为JSON字符串）
+            value: 设置值（msgpack 可用时编码为二进制，否则非字符串值将被转换为JSON字符串）
+            
+        Returns:
+            操作是否成功
+        """
+        return self.save_settings_many({key: value})
+    
+    def save_settings_many(self, settings: Dict[str, Any]) -> bool:
+        """
+        在同一个事务中批量保存多个设置键值对
+        
+        Args:
+            settings: 设置键 -> 设置值（msgpack 可用时编码为二进制，否则非字符串值将被转换为JSON字符串）
             
         Returns:
             操作是否成功
         """
+        if not settings:
+            return True
+        
         conn, cursor = self._get_connection()
         
         try:
-            # 将值转换为JSON字符串
-            if not isinstance(value, str):
-                value = json.dumps(value)
+            # 将值编码为 msgpack 二进制 (不可用时为JSON字符串)
+            params = [
+                (key, _pack_setting(value))
+                for key, value in settings.items()
+            ]
             
-            cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value, updated_at)
-            VALUES (?, ?, ?)
-            ''', (
-                key,
-                value,
-                datetime.now().isoformat()
-            ))
+            cursor.executemany(_SQL_SAVE_SETTING, params)
             
             conn.commit()
-            logger.debug(f"保存设置 {key}")
+            logger.debug(f"保存设置 {', '.join(settings)}")
             return True
         except sqlite3.Error as e:
             conn.rollback()
             logger.error(f"保存设置失败: {e}", exc_info=True)
             return False
-        finally:
-            conn.close()
     
     def get_setting(self, key: str, default: Any = None) -> Any:
         """
@@ -420,22 +573,15 @@ class DatabaseManager:
         conn, cursor = self._get_connection()
         
         try:
-            cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
+            cursor.execute(_SQL_SELECT_SETTING, (key,))
             row = cursor.fetchone()
             
             if row:
-                value = row[0]
-                # 尝试解析JSON
-                try:
-                    return json.loads(value)
-                except (json.JSONDecodeError, TypeError):
-                    return value
+                return _unpack_setting(row[0])
             return default
         except sqlite3.Error as e:
             logger.error(f"获取设置 {key} 失败: {e}", exc_info=True)
             return default
-        finally:
-            conn.close()
     
     def delete_setting(self, key: str) -> bool:
         """
@@ -450,7 +596,7 @@ class DatabaseManager:
         conn, cursor = self._get_connection()
         
         try:
-            cursor.execute('DELETE FROM settings WHERE key = ?', (key,))
+            cursor.execute(_SQL_DELETE_SETTING, (key,))
             conn.commit()
             logger.debug(f"删除设置 {key}")
             return True
@@ -458,8 +604,6 @@ class DatabaseManager:
             conn.rollback()
             logger.error(f"删除设置失败: {e}", exc_info=True)
             return False
-        finally:
-            conn.close()
     
     def backup_database(self, backup_path: Optional[str] = None) -> bool:
         """
@@ -471,23 +615,24 @@ class DatabaseManager:
         Returns:
             备份是否成功
         """
+        db_dir = os.path.dirname(self.db_path)
         if backup_path is None:
-            db_dir = os.path.dirname(self.db_path)
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_path = os.path.join(db_dir, f'stats_backup_{timestamp}.db')
         
         try:
-            # 创建备份目录
-            os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+            # 创建备份目录 (与数据库同目录时目录必然已存在，无需再检查)
+            backup_dir = os.path.dirname(backup_path)
+            if backup_dir and backup_dir != db_dir:
+                os.makedirs(backup_dir, exist_ok=True)
             
-            # 使用SQLite的备份API
-            source_conn = sqlite3.connect(self.db_path)
+            # 使用SQLite的备份API，以当前线程已打开的连接作为源，一次复制全部页面
+            source_conn, _ = self._get_connection()
             backup_conn = sqlite3.connect(backup_path)
-            
-            source_conn.backup(backup_conn)
-            
-            source_conn.close()
-            backup_conn.close()
+            try:
+                source_conn.backup(backup_conn, pages=-1)
+            finally:
+                backup_conn.close()
             
             logger.info(f"数据库已备份到: {backup_path}")
             return True
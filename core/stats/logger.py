@@ -13,7 +13,7 @@ from datetime import datetime, date, timedelta
 from typing import Dict, Any, List, Optional
 
 # 导入数据库管理器
-from core.stats.db_manager import DatabaseManager
+from core.stats.db_manager import DatabaseManager, json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -71,12 +71,12 @@ class StatsLogger:
                 'date': self.current_date,
                 'total_time': 0,
                 'keypress_count': 0,
-                'app_breakdown': json.dumps({}),
-                'hourly_breakdown': json.dumps({str(h): 0 for h in range(24)}),
-                'top_keys': json.dumps({}),
+                'app_breakdown': json_dumps({}),
+                'hourly_breakdown': json_dumps({str(h): 0 for h in range(24)}),
+                'top_keys': json_dumps({}),
                 'start_mood': 'normal',
                 'end_mood': None,
-                'achievements': json.dumps([]),
+                'achievements': json_dumps([]),
                 'goals_met': False,
                 'notes': ''
             }
@@ -86,7 +86,7 @@ class StatsLogger:
             for field in ['app_breakdown', 'hourly_breakdown', 'top_keys', 'achievements']:
                 if field in stats and stats[field]:
                     try:
-                        stats[field] = json.loads(stats[field])
+                        stats[field] = json_loads(stats[field])
                     except json.JSONDecodeError:
                         logger.warning(f"无法解析字段 {field} 的JSON数据，重置为空")
                         stats[field] = {} if field != 'achievements' else []
@@ -112,9 +112,9 @@ class StatsLogger:
         # 更新统计数据
         self.today_stats['total_time'] = activity_stats.get('total_time', 0)
         self.today_stats['keypress_count'] = key_stats.get('total_keypresses', 0)
-        self.today_stats['app_breakdown'] = json.dumps(activity_stats.get('app_breakdown', {}))
-        self.today_stats['hourly_breakdown'] = json.dumps(key_stats.get('hourly_breakdown', {}))
-        self.today_stats['top_keys'] = json.dumps(key_stats.get('top_keys', {}))
+        self.today_stats['app_breakdown'] = json_dumps(activity_stats.get('app_breakdown', {}))
+        self.today_stats['hourly_breakdown'] = json_dumps(key_stats.get('hourly_breakdown', {}))
+        self.today_stats['top_keys'] = json_dumps(key_stats.get('top_keys', {}))
         
         # 检查目标是否达成
         daily_goal_hours = self.config.get_setting('stats.daily_goal', 6)
@@ -127,7 +127,7 @@ class StatsLogger:
     
     def _save_today_stats(self) -> None:
         """保存今天的统计数据到数据库（临时保存）"""
-        self.db_manager.update_day_stats(self.today_stats)
+        self.db_manager.insert_day_stats(self.today_stats)
     
     def save_daily_stats(self) -> None:
         """保存每日统计（在一天结束或程序退出时调用）"""
@@ -140,9 +140,14 @@ class StatsLogger:
             self.today_stats['end_mood'] = 'happy' if self.today_stats.get('goals_met', False) else 'tired'
         
         # 最终保存
-        self.db_manager.update_day_stats(self.today_stats)
+        self.db_manager.insert_day_stats(self.today_stats)
         logger.info(f"日期 {self.current_date} 的统计数据已保存")
     
+    def close(self) -> None:
+        """保存当天统计并关闭数据库连接（在程序退出时调用）"""
+        self.save_daily_stats()
+        self.db_manager.close()
+    
     def get_streak_info(self) -> Dict[str, Any]:
         """
         获取连续编程的天数信息
@@ -209,7 +214,8 @@ class StatsLogger:
         # 获取过去7天的统计
         end_date = date.today()
         start_date = end_date - timedelta(days=6)  # 7天，包括今天
-        daily_stats = self.db_manager.get_stats_range(start_date.isoformat(), end_date.isoformat())
+        # 只需遍历一次，逐行读取即可，不必先取出完整列表
+        daily_stats = self.db_manager.iter_stats_range(start_date.isoformat(), end_date.isoformat())
         
         # 初始化天数数据
         days_data = []
@@ -266,7 +272,7 @@ class StatsLogger:
         achievements = self.today_stats.get('achievements', [])
         if isinstance(achievements, str):
             try:
-                achievements = json.loads(achievements)
+                achievements = json_loads(achievements)
             except:
                 achievements = []
         
@@ -279,7 +285,7 @@ class StatsLogger:
                 'description': achievement_data.get('description', '')
             })
             
-            self.today_stats['achievements'] = json.dumps(achievements)
+            self.today_stats['achievements'] = json_dumps(achievements)
             self._save_today_stats()
             logger.info(f"添加成就 '{achievement_id}' 到统计")
     
@@ -133,8 +133,8 @@ class ASRClient:
             self.audio_recorder.stop_recording()
         
         # 等待最终识别结果
-        timeout = time.time() + 2.0  # 2秒超时
-        while not self.is_final_result and time.time() < timeout:
+        timeout = time.monotonic() + 2.0  # 2秒超时
+        while not self.is_final_result and time.monotonic() < timeout:
             time.sleep(0.1)
         
         # 关闭WebSocket连接
@@ -367,8 +367,8 @@ class ASRClient:
                 self.ws.send(json.dumps(end_message))
             
             # 等待最终识别结果
-            timeout = time.time() + 5.0  # 5秒超时
-            while not self.is_final_result and time.time() < timeout:
+            timeout = time.monotonic() + 5.0  # 5秒超时
+            while not self.is_final_result and time.monotonic() < timeout:
                 time.sleep(0.1)
                 
             # 关闭WebSocket连接
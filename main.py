@@ -69,8 +69,9 @@ def main_application(): #
             show_tkinter_error("settings.yaml 加载失败或内容为空！请检查或删除后重新运行以生成默认配置。") #
             return 1 #
         # model_config.json 的检查可以根据实际需要决定是否关键到需要退出
-        if not config_mngr.model_config: #
-            logger.warning("model_config.json 加载失败或内容为空。如果不需要模型相关功能，可以忽略。") #
+        # 这里只检查文件是否存在，不读取 model_config 属性，解析推迟到首次真正使用时
+        if not os.path.exists(config_mngr.model_config_path): #
+            logger.warning("model_config.json 不存在。如果不需要模型相关功能，可以忽略。") #
 
         event_bus = EventSystem() #
         logger.info("事件系统已初始化。") #
@@ -105,7 +106,7 @@ def main_application(): #
         if pet_controller.pet.current_action: #
             logger.info(f"主程序：触发宠物控制器已设置（或在初始化时设定）的初始动作 '{pet_controller.pet.current_action.value}'。") #
             # 直接调用 PetController 的 set_action 来确保其内部逻辑（包括事件发出）被执行
-            pet_controller.set_action(pet_controller.pet.current_action) # 不再直接 emit，让 controller 自己 emit
+            pet_controller.set_action(pet_controller.pet.current_action, force=True) # 不再直接 emit，让 controller 自己 emit (动作未变也要播放)
         else: #
             logger.warning("主程序：宠物控制器未设定初始动作，强制设置为 IDLE。") #
             pet_controller.set_action(ActionType.IDLE) #
@@ -120,6 +121,8 @@ def main_application(): #
         # 在主事件循环结束后，显式调用 shutdown 方法
         if pet_controller_instance: #
             pet_controller_instance.shutdown() #
+        # 写入尚未落盘的延迟保存
+        config_mngr.flush()
         
         sys.exit(exit_code) #
 
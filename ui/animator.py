@@ -13,6 +13,12 @@ from PyQt5.QtWidgets import QApplication
 
 # 获取当前模块的日志记录器实例
 logger = logging.getLogger(__name__) # <<< 新增：获取logger实例
+
+# 动作文件夹内的速度配置文件名
+ANIMATION_CONFIG_FILENAME = "animation_config.json"
+# 可识别为动画帧的图片扩展名 (小写)
+FRAME_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
 class Animator:
     # 使用 Optional 进行了类型提示
     def __init__(self, base_pet_path: str, initial_animation_name: Optional[str] = "idle", default_speed_ms: int = 100): #
@@ -26,15 +32,17 @@ class Animator:
         self._current_animation_name: Optional[str] = None #
         self._current_frames: List[QPixmap] = [] #
         self._current_frame_index: int = 0 #
+        self._current_frame_count: int = 0 # 当前帧列表长度的缓存，随 _current_frames 一起更新
         self._current_action_speed_ms: int = self.default_speed_ms #
 
         self._frame_size: QSize = QSize(0, 0) #
 
-        self.load_all_animations_from_subfolders() #
-
+        # 动作按需加载：这里只加载初始动作，其余动作在首次 set_current_animation 时才读取文件
         if initial_animation_name and self.set_current_animation(initial_animation_name): #
             pass 
-        elif self._animations: #
+        else: #
+            # 初始动作不可用时，才扫描全部子文件夹寻找第一个可用的动作
+            self.load_all_animations_from_subfolders() #
             for anim_name, frames in self._animations.items(): #
                 if frames: #
                     if self.set_current_animation(anim_name): #
@@ -45,10 +53,35 @@ class Animator:
 
 
     def load_animation_sequence(self, animation_name: str) -> bool: #
+        # 已加载过的动作直接使用缓存，不再访问文件系统 (帧和速度总是一起写入缓存)
+        if animation_name in self._animations: #
+            logger.debug("Animator: 动作 '%s' 的帧已存在于缓存中，跳过帧加载。", animation_name) #
+            if self._current_animation_name == animation_name: #
+                self._current_action_speed_ms = self._action_speeds[animation_name] #
+            return True if self._animations[animation_name] else False #
         action_folder_path = os.path.join(self.base_pet_path, animation_name) #
+        folder_prefix = action_folder_path + os.sep # 每个文件夹只拼接一次前缀，逐个文件直接字符串相加，省去 os.path.join
+        # 对动作文件夹只做一次 scandir：同时找出帧图片和速度配置文件，DirEntry 自带类型信息，无需逐个 stat
+        image_files = [] #
+        has_config_file = False #
+        folder_found = True #
+        try: #
+            with os.scandir(action_folder_path) as entries: #
+                for entry in entries: #
+                    if not entry.is_file(): #
+                        continue #
+                    name = entry.name #
+                    if name == ANIMATION_CONFIG_FILENAME: #
+                        has_config_file = True #
+                        continue #
+                    lower_name = name.lower() #
+                    if lower_name.startswith('frame') and lower_name.endswith(FRAME_IMAGE_EXTENSIONS): #
+                        image_files.append(name) #
+        except (FileNotFoundError, NotADirectoryError): #
+            folder_found = False #
         loaded_speed_for_this_action = self.default_speed_ms #
-        config_file_path = os.path.join(action_folder_path, "animation_config.json") #
-        if os.path.exists(config_file_path): #
+        config_file_path = folder_prefix + ANIMATION_CONFIG_FILENAME #
+        if has_config_file: #
             try: #
                 with open(config_file_path, 'r', encoding='utf-8') as f: #
                     config_data = json.load(f) #
@@ -63,29 +96,20 @@ class Animator:
             except Exception as e: #
                 logger.error(f"Animator: 读取动作 '{animation_name}' 的配置文件 '{config_file_path}' 时发生未知错误: {e}。将使用默认速度 {self.default_speed_ms}ms。", exc_info=True) #
         else: #
-            logger.debug(f"Animator: 未找到动作 '{animation_name}' 的专属速度配置文件 ('animation_config.json')。将使用默认速度 {self.default_speed_ms}ms。") #
+            logger.debug(f"Animator: 未找到动作 '{animation_name}' 的专属速度配置文件 ('{ANIMATION_CONFIG_FILENAME}')。将使用默认速度 {self.default_speed_ms}ms。") #
         self._action_speeds[animation_name] = loaded_speed_for_this_action #
-        if animation_name in self._animations: #
-            logger.debug(f"Animator: 动作 '{animation_name}' 的帧已存在于缓存中，跳过帧加载。") #
-            if self._current_animation_name == animation_name: #
-                self._current_action_speed_ms = self._action_speeds[animation_name] #
-            return True if self._animations[animation_name] else False #
         frames = []  #
-        if not os.path.isdir(action_folder_path): #
+        if not folder_found: #
             logger.warning(f"Animator: 动作文件夹 '{action_folder_path}' 未找到 (在角色路径 '{self.base_pet_path}' 下)。无法加载帧。") #
             self._animations[animation_name] = [] #
             return False #
-        image_files = sorted([ #
-            f for f in os.listdir(action_folder_path) #
-            if os.path.isfile(os.path.join(action_folder_path, f)) and  #
-               f.lower().startswith('frame') and f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp')) #
-        ]) #
+        image_files.sort() #
         if not image_files: #
             logger.warning(f"Animator: 在动作文件夹 '{action_folder_path}' 中未找到名为 'frameXX.png' (或类似) 格式的图片文件。") #
             self._animations[animation_name] = [] #
             return False #
         for image_file in image_files: #
-            full_image_path = os.path.join(action_folder_path, image_file) #
+            full_image_path = folder_prefix + image_file #
             pixmap = QPixmap(full_image_path) #
             if not pixmap.isNull(): #
                 frames.append(pixmap) #
@@ -108,10 +132,10 @@ class Animator:
             logger.error(f"Animator 错误: 特定角色动画的根目录 '{self.base_pet_path}' 不存在。") #
             return #
         logger.info(f"Animator: 为角色 '{os.path.basename(self.base_pet_path)}' 加载所有可用动作动画...") #
-        for action_folder_name in os.listdir(self.base_pet_path): #
-            action_folder_path = os.path.join(self.base_pet_path, action_folder_name) #
-            if os.path.isdir(action_folder_path): #
-                self.load_animation_sequence(action_folder_name) #
+        with os.scandir(self.base_pet_path) as entries: # DirEntry 自带类型信息，无需逐个 isdir
+            for entry in entries: #
+                if entry.is_dir(): #
+                    self.load_animation_sequence(entry.name) #
 
     def set_current_animation(self, animation_name: str) -> bool: #
         logger.info(f"Animator: 请求设置当前动作为 '{animation_name}'. 当前是 '{self._current_animation_name}'.") #
@@ -123,6 +147,7 @@ class Animator:
             else: #
                  self._current_animation_name = None #
                  self._current_frames = [] #
+                 self._current_frame_count = 0 #
                  self._current_frame_index = 0 #
                  self._current_action_speed_ms = self.default_speed_ms #
                  return False #
@@ -130,6 +155,7 @@ class Animator:
             logger.info(f"Animator: 角色 '{os.path.basename(self.base_pet_path)}' 切换/设置为动作: '{animation_name}'") #
             self._current_animation_name = animation_name #
             self._current_frames = self._animations[animation_name] #
+            self._current_frame_count = len(self._current_frames) #
             self._current_frame_index = 0 #
             self._current_action_speed_ms = self._action_speeds.get(animation_name, self.default_speed_ms) #
             if self._current_frames and self._frame_size.isEmpty(): #
@@ -143,14 +169,17 @@ class Animator:
             return False #
 
     def next_frame(self) -> QPixmap: #
-        if not self._current_frames: #
+        frame_count = self._current_frame_count #
+        if not frame_count: #
             return QPixmap()  #
-        self._current_frame_index = (self._current_frame_index + 1) % len(self._current_frames) #
-        return self._current_frames[self._current_frame_index] #
+        index = self._current_frame_index + 1 #
+        if index >= frame_count: # 索引每次只前进一步，越界时归零即可，无需取模
+            index = 0 #
+        self._current_frame_index = index #
+        return self._current_frames[index] #
 
     def get_current_frame_pixmap(self) -> QPixmap: #
-        if not self._current_frames or \
-           not (0 <= self._current_frame_index < len(self._current_frames)): #
+        if not (0 <= self._current_frame_index < self._current_frame_count): #
             return QPixmap() #
         return self._current_frames[self._current_frame_index] #
 
@@ -168,7 +168,7 @@ class PetWindow(QWidget):
         if self.current_pet_character_name == character_name_from_event and action_name_from_event: #
             if self.animation_timer.isActive(): #
                 current_anim_name = self.animator._current_animation_name if self.animator and hasattr(self.animator, '_current_animation_name') else '未知' #
-                logger.debug(f"PetWindow (_process_play_animation_event): 停止当前活动的定时器 (原动作: '{current_anim_name}')，准备播放新动作: '{action_name_from_event}'.") #
+                logger.debug("PetWindow (_process_play_animation_event): 停止当前活动的定时器 (原动作: '%s')，准备播放新动作: '%s'.", current_anim_name, action_name_from_event) #
                 self.animation_timer.stop() # 现在这个 stop() 调用是线程安全的 #
             
             self.play_animation(action_name_from_event) # 调用 play_animation，它也会在主线程 #
@@ -192,9 +192,10 @@ class PetWindow(QWidget):
                 first_frame = self.animator.get_current_frame_pixmap() #
                 if not first_frame.isNull(): #
                     self.pet_label.setPixmap(first_frame) #
-                    logger.debug(f"PetWindow.play_animation: 已设置 '{animation_name}' 的第一帧。 " #
-                                 f"帧尺寸: {first_frame.size()}, 窗口可见: {self.isVisible()}, " #
-                                 f"Label可见: {self.pet_label.isVisible()}, Label尺寸: {self.pet_label.size()}") #
+                    if logger.isEnabledFor(logging.DEBUG): # 尺寸/可见性查询只在开启 DEBUG 时进行
+                        logger.debug(f"PetWindow.play_animation: 已设置 '{animation_name}' 的第一帧。 " #
+                                     f"帧尺寸: {first_frame.size()}, 窗口可见: {self.isVisible()}, " #
+                                     f"Label可见: {self.pet_label.isVisible()}, Label尺寸: {self.pet_label.size()}") #
                 else: #
                     self.pet_label.setText(f"{self.current_pet_character_name}\n{animation_name}\n(首帧错误)") #
                     self.pet_label.setAlignment(Qt.AlignCenter) #
@@ -230,14 +231,18 @@ class PetWindow(QWidget):
             next_pixmap = self.animator.next_frame() #
             
             is_pixmap_null = next_pixmap.isNull() #
-            pixmap_size = next_pixmap.size() if not is_pixmap_null else 'N/A' #
-            logger.debug(f"PetWindow.update_animation: 动作='{current_action_name}', " #
-                         f"原索引={current_frame_idx}, 新索引={self.animator._current_frame_index}, " #
-                         f"下一帧IsNull={is_pixmap_null}, 下一帧尺寸={pixmap_size}, " #
-                         f"定时器激活={self.animation_timer.isActive()}, 窗口可见={self.isVisible()}") #
+            # 该方法按帧率频繁调用，只有开启 DEBUG 时才收集尺寸/可见性等信息并格式化日志
+            if logger.isEnabledFor(logging.DEBUG): #
+                pixmap_size = next_pixmap.size() if not is_pixmap_null else 'N/A' #
+                logger.debug(f"PetWindow.update_animation: 动作='{current_action_name}', " #
+                             f"原索引={current_frame_idx}, 新索引={self.animator._current_frame_index}, " #
+                             f"下一帧IsNull={is_pixmap_null}, 下一帧尺寸={pixmap_size}, " #
+                             f"定时器激活={self.animation_timer.isActive()}, 窗口可见={self.isVisible()}") #
 
             if not is_pixmap_null: #
-                self.pet_label.setPixmap(next_pixmap) #
+                # 帧索引未变化 (单帧动作) 时标签上已是这一帧，无需重新设置和重绘
+                if self.animator._current_frame_index != current_frame_idx: #
+                    self.pet_label.setPixmap(next_pixmap) #
             else: #
                 logger.warning(f"PetWindow.update_animation: 警告 - 动作 '{current_action_name}' 的 next_frame() 返回了空 Pixmap。动画可能中断。") #
                 if self.animation_timer.isActive(): #